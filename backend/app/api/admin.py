@@ -5,13 +5,12 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import func
 from sqlmodel import select
 
 from .. import schemas
 from ..database import get_session
 from ..models import Chunk, Course, EmbeddingStatus, Resource, ResourceType, Section
-from ..services import create_course, create_resource, processor, storage
+from ..services import create_course, create_resource, processor, stats, storage
 from ..services.vectorstore import VectorStoreError, count_course_collection
 
 templates = Jinja2Templates(directory=str(Path(__file__).resolve().parents[1] / "templates"))
@@ -30,33 +29,35 @@ def _get_vector_count(course_id: int) -> Optional[int]:
 
 @router.get("/courses")
 def list_courses(request: Request, session=Depends(get_session)):
-    courses = session.exec(select(Course).order_by(Course.created_at.desc())).all()
-    course_stats = []
-    for course in courses:
-        resource_count = session.exec(
-            select(func.count(Resource.id)).where(Resource.course_id == course.id)
-        ).one()
-        section_count = session.exec(
-            select(func.count(Section.id)).where(Section.course_id == course.id)
-        ).one()
-        vector_count = _get_vector_count(course.id)
-        course_stats.append(
-            {
-                "course": course,
-                "resource_count": resource_count,
-                "section_count": section_count,
-                "vector_count": vector_count,
-            }
-        )
     return templates.TemplateResponse(
         "admin/courses.html",
         {
             "request": request,
-            "course_stats": course_stats,
+            "course_stats": stats.course_overview(session),
         },
     )
 
 
+@router.get("/courses/stats", response_model=schemas.CourseStatsResponse)
+def course_stats_json(session=Depends(get_session)):
+    return schemas.CourseStatsResponse(
+        courses=[
+            schemas.CourseStats(
+                id=item["course"].id,
+                name=item["course"].name,
+                embedding_status=item["course"].embedding_status,
+                embedding_progress=item["course"].embedding_progress,
+                resource_count=item["resource_count"],
+                section_count=item["section_count"],
+                chunk_count=item["chunk_count"],
+                vector_count=item["vector_count"],
+                created_at=item["course"].created_at,
+            )
+            for item in stats.course_overview(session)
+        ]
+    )
+
+
 @router.post("/courses")
 def create_course_from_form(
     request: Request,
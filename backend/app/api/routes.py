@@ -1,25 +1,53 @@
+import asyncio
+import json
 import logging
+from concurrent.futures import TimeoutError as FutureTimeout
 from time import perf_counter
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
 
 from .. import schemas
 from ..config import PaginationParams, get_settings
-from ..database import get_session
+from ..database import get_session, session_context
 from ..models import Course, EmbeddingStatus, Resource, ResourceType
 from ..services import (
     assemble_course_if_ready,
     build_course_outline,
+    course_outline_json,
     create_course,
     create_resource,
+    create_resources,
     embed_texts,
+    embedding_version,
+    events,
+    export,
     fetch_course_chunks,
+    hydration,
+    infer_upload_type,
+    lexical,
+    outline_etag,
     processor,
+    rerank,
     retry_resource,
+    search_cache,
+    stats,
     storage,
     update_section,
 )
-from ..services.vectorstore import VectorStoreError, search_course_chunks
+from ..services.deadline import Deadline, DeadlineExceeded
+from ..services.inference import ExecutorSaturated, inference_executor
+from ..services.vectorstore import (
+    FINGERPRINT_KEYS,
+    RebuildNotSupportedError,
+    VectorQuery,
+    VectorStoreError,
+    rebuild_course_collection,
+    search_course_chunks_batch,
+)
 from .deps import require_internal_token
 
 logger = logging.getLogger(__name__)
@@ -66,6 +94,68 @@ async def upload_resource_route(
     return schemas.ResourceRead.model_validate(resource)
 
 
+@router.post("/resources/batch", response_model=schemas.ResourceBatchResponse, status_code=status.HTTP_201_CREATED)
+def create_resources_batch_route(payload: schemas.ResourceBatchCreate, session=Depends(get_session)):
+    resources = create_resources(session, payload.course_id, payload.items)
+    processor.enqueue_resources([resource.id for resource in resources])
+    return schemas.ResourceBatchResponse(
+        course_id=payload.course_id,
+        items=[schemas.ResourceRead.model_validate(resource) for resource in resources],
+    )
+
+
+@router.post(
+    "/resources/upload/batch",
+    response_model=schemas.ResourceBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def upload_resources_batch_route(
+    course_id: int = Form(...),
+    files: List[UploadFile] = File(...),
+    resource_types: Optional[List[ResourceType]] = Form(None),
+    session=Depends(get_session),
+):
+    """Upload many document files at once; ``resource_types`` defaults to the file extension.
+
+    同步路由在线程池中执行，文件按块写盘；任一文件落盘失败则整个批次回滚并清理已写文件。
+    """
+    if resource_types is not None and len(resource_types) != len(files):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "resource_types_mismatch", "files": len(files), "resource_types": len(resource_types)},
+        )
+    types = resource_types or [infer_upload_type(upload.filename) for upload in files]
+    if ResourceType.video in types:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Video uploads not supported; use URL.")
+    items = [
+        schemas.ResourceBatchItem(
+            resource_type=resource_type,
+            display_name=upload.filename,
+            original_filename=upload.filename,
+        )
+        for upload, resource_type in zip(files, types)
+    ]
+    saved: List[int] = []
+
+    def save_files(resources: List[Resource]) -> None:
+        for resource, upload in zip(resources, files):
+            saved.append(resource.id)
+            saved_path = storage.save_uploaded_file(resource.id, upload)
+            resource.meta = {**(resource.meta or {}), "local_path": str(saved_path)}
+
+    try:
+        resources = create_resources(session, course_id, items, before_commit=save_files)
+    except Exception:
+        for resource_id in saved:
+            storage.remove_resource_dir(resource_id)
+        raise
+    processor.enqueue_resources([resource.id for resource in resources])
+    return schemas.ResourceBatchResponse(
+        course_id=course_id,
+        items=[schemas.ResourceRead.model_validate(resource) for resource in resources],
+    )
+
+
 @router.get("/resources/{resource_id}", response_model=schemas.ResourceRead)
 def read_resource(resource_id: int, session=Depends(get_session)):
     resource = session.get(Resource, resource_id)
@@ -82,8 +172,19 @@ def retry_resource_route(resource_id: int, session=Depends(get_session)):
 
 
 @router.get("/courses/{course_id}/outline", response_model=schemas.CourseOutline)
-def get_course_outline(course_id: int, session=Depends(get_session)):
-    return build_course_outline(session, course_id)
+def get_course_outline(course_id: int, request: Request, session=Depends(get_session)):
+    course = session.get(Course, course_id)
+    if not course:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    etag = outline_etag(course)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        # 轮询时只需一次主键查询即可确认未变化
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    _, body = course_outline_json(session, course)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/courses/{course_id}/chunks", response_model=schemas.Pagination)
@@ -92,10 +193,37 @@ def list_course_chunks(
     pagination: PaginationParams = Depends(),
     session=Depends(get_session),
 ):
-    total, items = fetch_course_chunks(session, course_id, pagination.limit, pagination.offset)
+    total, items, next_cursor = fetch_course_chunks(
+        session, course_id, pagination.limit, pagination.offset, pagination.cursor
+    )
     return schemas.Pagination(
         total=total,
         items=[schemas.ChunkRead.model_validate(item) for item in items],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/courses/{course_id}/export")
+def export_course_data(
+    course_id: int,
+    kind: Literal["chunks", "content_pieces"] = "chunks",
+    fields: Optional[str] = None,
+    gzip: bool = False,
+    session=Depends(get_session),
+    _: None = Depends(require_internal_token),
+):
+    """Stream all chunks / content pieces of a course as NDJSON (``fields`` is comma separated)."""
+    if not session.get(Course, course_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    selected = export.resolve_fields(kind, fields)
+    filename = f"course_{course_id}_{kind}.ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export.iter_course_export(course_id, kind, selected, compress=gzip),
+        media_type="application/x-ndjson",
+        headers=headers,
     )
 
 
@@ -130,7 +258,20 @@ def embed_texts_route(
     if payload.model and payload.model != settings.embedding_model_name:
         logger.warning("Client requested model %s but backend configured %s", payload.model, settings.embedding_model_name)
     start = perf_counter()
-    vectors = embed_texts(payload.texts)
+    try:
+        future = inference_executor.submit(embed_texts, payload.texts)
+    except ExecutorSaturated as exc:
+        raise _inference_saturated(exc) from exc
+    try:
+        vectors = future.result(timeout=settings.inference_queue_timeout_s)
+    except FutureTimeout as exc:
+        future.cancel()
+        retry_after = inference_executor.retry_after()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"code": "inference_timeout", "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)},
+        ) from exc
     elapsed = (perf_counter() - start) * 1000
     logger.info("Handled /embed request texts=%s in %.2f ms", len(payload.texts), elapsed)
     return schemas.EmbeddingResponse(vectors=vectors)
@@ -173,68 +314,453 @@ def get_course_embedding_status(course_id: int, session=Depends(get_session)):
     )
 
 
+SSE_KEEPALIVE_SECONDS = 15
+SSE_RETRY_MS = 3000
+
+
+def _sse_message(event_type: str, data: Dict[str, object], event_id: Optional[str] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _course_snapshot(course_id: int) -> Optional[Dict[str, object]]:
+    with session_context() as session:
+        course = session.get(Course, course_id)
+        if not course:
+            return None
+        resources = session.exec(
+            select(Resource).where(Resource.course_id == course_id).order_by(Resource.id)
+        ).all()
+        return events.snapshot(course, list(resources))
+
+
+@router.get("/courses/{course_id}/events")
+async def stream_course_events(course_id: int, request: Request):
+    """Server-Sent Events stream of resource stages and embedding progress for a course.
+
+    首条事件为当前状态快照；断线重连时浏览器携带 Last-Event-ID，缓冲区能完整补齐时只补发缺失事件，
+    否则（断线过久、进程重启）重新发送快照。
+    """
+    # 其他进程/重启前签发的 id 解析为 None，直接发送快照
+    last_event_id = events.bus.parse_id(request.headers.get("last-event-id"))
+    # 先订阅再取快照，避免两者之间发生的状态变化丢失（重复的事件客户端按最新值覆盖即可）
+    subscriber, resumed = events.bus.subscribe(course_id, last_event_id)
+    try:
+        current = await run_in_threadpool(_course_snapshot, course_id)
+    except Exception:
+        events.bus.unsubscribe(course_id, subscriber)
+        raise
+    if current is None:
+        events.bus.unsubscribe(course_id, subscriber)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+
+    async def stream():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            if not resumed:
+                # 首次连接，或缓冲区已无法补齐断线期间的事件
+                yield _sse_message("snapshot", current)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse_message(event.type, event.data, events.bus.format_id(event))
+        finally:
+            events.bus.unsubscribe(course_id, subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post(
-    "/courses/{course_id}/search",
-    response_model=schemas.SearchResponse,
+    "/courses/{course_id}/vector_index/rebuild",
+    response_model=schemas.VectorIndexRebuildResponse,
 )
-def search_course_chunks_route(
+def rebuild_course_vector_index(
     course_id: int,
-    payload: schemas.SearchRequest,
+    payload: schemas.VectorIndexConfig,
     session=Depends(get_session),
     _: None = Depends(require_internal_token),
 ):
     course = session.get(Course, course_id)
     if not course:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    if course.embedding_status in {EmbeddingStatus.pending, EmbeddingStatus.running}:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"code": "embedding_already_running"},
+        )
+    params = payload.model_dump(exclude_none=True)
+    start = perf_counter()
+    try:
+        vector_count = rebuild_course_collection(course_id, params)
+        search_cache.invalidate_course(course_id)
+        # 重建后的条数写回 course.meta，管理页概览不再显示旧值
+        stats.refresh_vector_count(course)
+        session.add(course)
+        session.commit()
+    except RebuildNotSupportedError as exc:
+        # 配置决定的预期情况（如 NumPy 后端），不是故障，不打堆栈
+        logger.warning("Vector index rebuild not supported for course %s: %s", course_id, exc)
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail={"code": "vector_index_rebuild_not_supported", "backend": get_settings().vector_store_backend},
+        ) from exc
+    except VectorStoreError as exc:
+        logger.exception("Vector index rebuild failed for course %s: %s", course_id, exc)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"code": "vector_store_error", "message": str(exc)},
+        ) from exc
+    logger.info(
+        "Rebuilt vector index for course %s with %s (%s vectors) in %.2f ms",
+        course_id,
+        params,
+        vector_count,
+        (perf_counter() - start) * 1000,
+    )
+    return schemas.VectorIndexRebuildResponse(course_id=course_id, vector_count=vector_count, config=payload)
+
+
+def _get_searchable_course(session, course_id: int, require_vectors: bool = True) -> Course:
+    course = session.get(Course, course_id)
+    if not course:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    if not require_vectors:
+        # 纯 lexical 检索只依赖 assembly 产出的倒排索引，不要求向量化完成
+        return course
     if course.embedding_status != EmbeddingStatus.done:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={"code": "embedding_not_ready"},
         )
-    query = payload.query.strip()
-    if not query:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="query must not be empty")
+    course_version = (course.meta or {}).get("embedding_version")
+    if course_version and course_version != embedding_version():
+        # 截断维度/精度配置变化后，旧向量与查询向量不在同一空间，需要重新向量化
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"code": "embedding_version_mismatch", "expected": course_version},
+        )
+    return course
+
+
+def _inference_saturated(exc: ExecutorSaturated) -> HTTPException:
+    logger.warning("Rejected model request: %s (retry after %ss)", exc, exc.retry_after)
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail={"code": "inference_saturated", "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
-    search_start = perf_counter()
+
+def _embed_queries(course_id: int, queries: List[str], deadline: Deadline) -> List[List[float]]:
     try:
-        vectors = embed_texts([query])
+        vectors = deadline.run("embed", search_cache.embed_queries, queries, executor=inference_executor)
+    except DeadlineExceeded:
+        raise
+    except ExecutorSaturated as exc:
+        raise _inference_saturated(exc) from exc
     except Exception as exc:
         logger.exception("Embedding service unavailable during search for course %s: %s", course_id, exc)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail={"code": "embedding_service_unavailable", "message": "embedding service error"},
         ) from exc
-
-    if not vectors:
+    if len(vectors) != len(queries):
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="embedding_service_unavailable")
+    return vectors
 
-    filter_dict = payload.filters.model_dump(exclude_none=True) if payload.filters else {}
-    try:
-        results = search_course_chunks(course_id, vectors[0], payload.top_k, filter_dict)
-    except VectorStoreError as exc:
-        logger.exception("Vector store error during search for course %s: %s", course_id, exc)
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail={"code": "vector_store_error", "message": "vector store unavailable"},
-        ) from exc
-    elapsed_ms = (perf_counter() - search_start) * 1000
-    logger.info(
-        "Search course %s query='%s' top_k=%s filters=%s hits=%s took %.2f ms",
-        course_id,
-        query[:80],
-        payload.top_k,
-        filter_dict or {},
-        len(results),
-        elapsed_ms,
+
+def _vector_store_unavailable(course_id: int, exc: VectorStoreError) -> HTTPException:
+    logger.exception("Vector store error during search for course %s: %s", course_id, exc)
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={"code": "vector_store_error", "message": "vector store unavailable"},
     )
+
+
+def _to_search_response(
+    results: List[dict],
+    deadline: Optional[Deadline] = None,
+    degraded_stage: Optional[str] = None,
+    error: Optional[Dict[str, object]] = None,
+) -> schemas.SearchResponse:
+    timings = {}
+    if deadline is not None:
+        timings = {**deadline.timings, "total": deadline.elapsed_ms()}
     return schemas.SearchResponse(
         results=[
             schemas.SearchResult(
                 chunk_id=item["chunk_id"],
                 score=item.get("score"),
                 text=item["text"],
-                metadata=item.get("metadata", {}),
+                metadata={
+                    key: value for key, value in (item.get("metadata") or {}).items() if key not in FINGERPRINT_KEYS
+                },
             )
             for item in results
+        ],
+        partial=degraded_stage is not None,
+        degraded_stage=degraded_stage,
+        timings_ms=timings,
+        error=error,
+    )
+
+
+# (stripped query, request, normalized filters)
+SearchSpec = Tuple[str, schemas.SearchRequest, Dict[str, int | str]]
+
+
+def _search_options(item: schemas.SearchRequest) -> Tuple[object, ...]:
+    if item.diversify and item.mode != "lexical":
+        return (item.mode, True, item.mmr_lambda, item.fetch_k)
+    return (item.mode,)
+
+
+def _search_deadline(items: Sequence[schemas.SearchRequest]) -> Deadline:
+    default = get_settings().search_timeout_ms
+    return Deadline(min(item.timeout_ms or default for item in items))
+
+
+SearchError = Dict[str, object]
+
+
+def _run_searches(
+    session,
+    course_id: int,
+    specs: Sequence[SearchSpec],
+    deadline: Deadline,
+) -> Tuple[List[List[dict]], List[Optional[str]], List[Optional[SearchError]]]:
+    """Execute searches in any mode, batching all vector lookups into one store call.
+
+    Returns the results plus, per search, the stage that ran out of budget when
+    the result was degraded and the error detail when it failed. A search that
+    loses a stage degrades only with ``allow_partial`` (hybrid keeps its other
+    half, vector mode falls back to BM25); otherwise that search alone gets an
+    error and the rest of a batch is unaffected.
+    """
+    settings = get_settings()
+    results: List[List[dict]] = [[] for _ in specs]
+    degraded: List[Optional[str]] = [None for _ in specs]
+    errors: List[Optional[SearchError]] = [None for _ in specs]
+    candidate_k: List[int] = []
+    vector_k: List[int] = []
+    for _, item, _ in specs:
+        fused_k = item.top_k * settings.hybrid_candidate_multiplier if item.mode == "hybrid" else item.top_k
+        candidate_k.append(fused_k)
+        if item.diversify:
+            # MMR 从多于保留数的候选里挑选才能真正剔除近重复；混合模式保留 fused_k 条参与融合，
+            # 因此按 fused_k 而不是 top_k 放大取数
+            vector_k.append(max(item.fetch_k or fused_k * settings.mmr_fetch_multiplier, fused_k))
+        else:
+            vector_k.append(fused_k)
+
+    vector_results: Dict[int, List[dict]] = {}
+    vector_positions = [pos for pos, (_, item, _) in enumerate(specs) if item.mode != "lexical"]
+    lexical_positions = [pos for pos, (_, item, _) in enumerate(specs) if item.mode != "vector"]
+    if vector_positions:
+        try:
+            vectors = _embed_queries(course_id, [specs[pos][0] for pos in vector_positions], deadline)
+            lookups = [
+                VectorQuery(
+                    vector=vector,
+                    top_k=vector_k[pos],
+                    filters=specs[pos][2] or None,
+                    include_embeddings=specs[pos][1].diversify,
+                )
+                for vector, pos in zip(vectors, vector_positions)
+            ]
+            found = deadline.run("vector", search_course_chunks_batch, course_id, lookups)
+        except VectorStoreError as exc:
+            raise _vector_store_unavailable(course_id, exc) from exc
+        except DeadlineExceeded as exc:
+            for pos in vector_positions:
+                vector_results[pos] = []
+                if not specs[pos][1].allow_partial:
+                    errors[pos] = {"code": "search_deadline_exceeded", "stage": exc.stage}
+                    continue
+                degraded[pos] = exc.stage
+                if specs[pos][1].mode == "vector":
+                    lexical_positions.append(pos)
+        else:
+            with deadline.stage("rerank"):
+                for vector, pos, candidates in zip(vectors, vector_positions, found):
+                    item = specs[pos][1]
+                    if item.diversify:
+                        # 候选向量由向量库直接返回，不再调用模型；重排后去掉 embedding 以免进入缓存
+                        candidates = rerank.mmr_rerank(vector, candidates, candidate_k[pos], item.mmr_lambda)
+                        candidates = [{k: v for k, v in entry.items() if k != "embedding"} for entry in candidates]
+                    vector_results[pos] = candidates
+
+    lexical_results: Dict[int, List[dict]] = {}
+    lexical_positions = [pos for pos in lexical_positions if errors[pos] is None]
+    if lexical_positions:
+        with deadline.stage("lexical"):
+            try:
+                index = lexical.load_course_index(course_id)
+            except OSError as exc:
+                logger.exception("Lexical index unavailable for course %s: %s", course_id, exc)
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail={"code": "lexical_index_error", "message": "lexical index unavailable"},
+                ) from exc
+            for pos in lexical_positions:
+                query, item, filters = specs[pos]
+                lexical_results[pos] = []
+                if index is None:
+                    # 索引在后台补建中：允许部分结果的混合检索退化为纯向量结果
+                    if item.mode == "hybrid" and item.allow_partial:
+                        degraded[pos] = degraded[pos] or "lexical_index"
+                    elif item.mode != "vector":
+                        errors[pos] = {"code": "lexical_index_building", "message": "lexical index is being built"}
+                    continue
+                hits = lexical.bm25_search(index, query, candidate_k[pos], filters)
+                lexical_results[pos] = lexical.to_results(hits)
+
+    for pos, (_, item, _) in enumerate(specs):
+        if errors[pos] is not None:
+            continue
+        if item.mode == "lexical" or (item.mode == "vector" and degraded[pos]):
+            results[pos] = lexical_results[pos][: item.top_k]
+        elif item.mode == "vector":
+            results[pos] = vector_results[pos]
+        else:
+            results[pos] = lexical.reciprocal_rank_fusion([vector_results[pos], lexical_results[pos]], item.top_k)
+    for error in errors:
+        if error is not None:
+            error["timings_ms"] = deadline.timings
+    # 向量库未存原文或来自 lexical 的命中，统一一次 IN 查询回填文本
+    with deadline.stage("hydrate"):
+        return hydration.hydrate_many(session, course_id, results), degraded, errors
+
+
+def _search_error(error: SearchError) -> HTTPException:
+    headers = {"Retry-After": "5"} if error["code"] == "lexical_index_building" else None
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=error, headers=headers)
+
+
+@router.post(
+    "/courses/{course_id}/search",
+    response_model=schemas.SearchResponse,
+)
+def search_course_chunks_route(
+    course_id: int,
+    payload: schemas.SearchRequest,
+    session=Depends(get_session),
+    _: None = Depends(require_internal_token),
+):
+    course = _get_searchable_course(session, course_id, require_vectors=payload.mode != "lexical")
+    query = payload.query.strip()
+    if not query:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="query must not be empty")
+
+    deadline = _search_deadline([payload])
+    filter_dict = payload.filters.model_dump(exclude_none=True) if payload.filters else {}
+    cache_key = search_cache.result_cache_key(
+        course_id,
+        search_cache.course_cache_version(course),
+        query,
+        payload.top_k,
+        filter_dict,
+        _search_options(payload),
+    )
+    results = search_cache.get_cached_results(cache_key)
+    cached = results is not None
+    degraded_stage = None
+    if results is None:
+        found, degraded, errors = _run_searches(session, course_id, [(query, payload, filter_dict)], deadline)
+        if errors[0] is not None:
+            raise _search_error(errors[0])
+        results, degraded_stage = found[0], degraded[0]
+        if degraded_stage is None:
+            search_cache.cache_results(cache_key, results)
+    logger.info(
+        "Search course %s query='%s' mode=%s diversify=%s top_k=%s filters=%s hits=%s cached=%s degraded=%s "
+        "took %.2f ms",
+        course_id,
+        query[:80],
+        payload.mode,
+        payload.diversify,
+        payload.top_k,
+        filter_dict or {},
+        len(results),
+        cached,
+        degraded_stage,
+        deadline.elapsed_ms(),
+    )
+    return _to_search_response(results, deadline, degraded_stage)
+
+
+@router.post(
+    "/courses/{course_id}/search/batch",
+    response_model=schemas.BatchSearchResponse,
+)
+def batch_search_course_chunks_route(
+    course_id: int,
+    payload: schemas.BatchSearchRequest,
+    session=Depends(get_session),
+    _: None = Depends(require_internal_token),
+):
+    require_vectors = any(item.mode != "lexical" for item in payload.queries)
+    course = _get_searchable_course(session, course_id, require_vectors=require_vectors)
+    queries = [item.query.strip() for item in payload.queries]
+    if not all(queries):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="query must not be empty")
+
+    # 批量请求共享各阶段，预算取各查询中最紧的一个
+    deadline = _search_deadline(payload.queries)
+    course_version = search_cache.course_cache_version(course)
+    filters = [item.filters.model_dump(exclude_none=True) if item.filters else {} for item in payload.queries]
+    cache_keys = [
+        search_cache.result_cache_key(course_id, course_version, query, item.top_k, item_filters, _search_options(item))
+        for query, item, item_filters in zip(queries, payload.queries, filters)
+    ]
+    results: List[Optional[List[dict]]] = [search_cache.get_cached_results(key) for key in cache_keys]
+    degraded: List[Optional[str]] = [None for _ in queries]
+    errors: List[Optional[SearchError]] = [None for _ in queries]
+    missing = [pos for pos, item in enumerate(results) if item is None]
+    if missing:
+        # 未命中缓存的查询一次前向计算完成向量化，并合并为一次向量库查询
+        specs = [(queries[pos], payload.queries[pos], filters[pos]) for pos in missing]
+        found, stages, failures = _run_searches(session, course_id, specs, deadline)
+        for pos, item, stage, error in zip(missing, found, stages, failures):
+            results[pos] = item
+            degraded[pos] = stage
+            errors[pos] = error
+            if stage is None and error is None:
+                search_cache.cache_results(cache_keys[pos], item)
+    logger.info(
+        "Batch search course %s queries=%s cached=%s hits=%s degraded=%s failed=%s took %.2f ms",
+        course_id,
+        len(queries),
+        len(queries) - len(missing),
+        sum(len(item) for item in results),
+        sum(1 for stage in degraded if stage),
+        sum(1 for error in errors if error),
+        deadline.elapsed_ms(),
+    )
+    # 单个查询失败只体现在该查询的 error 字段，不影响同批其他查询
+    return schemas.BatchSearchResponse(
+        results=[
+            _to_search_response(item, deadline, stage, error)
+            for item, stage, error in zip(results, degraded, errors)
         ]
     )
+
+
+@router.get("/search/cache_stats")
+def get_search_cache_stats(_: None = Depends(require_internal_token)):
+    return search_cache.cache_stats()
+
+
+@router.get("/inference/stats")
+def get_inference_stats(_: None = Depends(require_internal_token)):
+    """Queue depth and throughput of the bounded model-inference executor."""
+    return inference_executor.stats()
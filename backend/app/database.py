@@ -2,6 +2,7 @@ from contextlib import contextmanager
 from pathlib import Path
 from typing import Iterator
 
+from sqlalchemy import event
 from sqlmodel import Session, SQLModel, create_engine
 
 from .config import get_settings
@@ -13,14 +14,50 @@ db_path = settings.database_url.replace("sqlite:///", "")
 if settings.database_url.startswith("sqlite:///"):
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
-engine = create_engine(settings.database_url, echo=False, future=True)
+is_sqlite = settings.database_url.startswith("sqlite")
+engine_options = {}
+if not is_sqlite or ":memory:" not in settings.database_url:
+    engine_options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_s,
+    }
+if is_sqlite:
+    if engine_options:
+        # sqlite3 自带的锁等待（秒），与 PRAGMA busy_timeout 保持一致
+        engine_options["connect_args"] = {"timeout": settings.sqlite_busy_timeout_ms / 1000}
+else:
+    # 多节点共享 PostgreSQL：取连接前探活，定期回收以适配 pgbouncer / 服务端空闲断开
+    engine_options.update(pool_pre_ping=True, pool_recycle=settings.db_pool_recycle_s)
+
+engine = create_engine(settings.database_url, echo=False, future=True, **engine_options)
+
+
+if is_sqlite:
+
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+        """Per-connection SQLite tuning: WAL so API reads never wait on worker writes."""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+            cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+            # 负数表示以 KiB 为单位
+            cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+        finally:
+            cursor.close()
 
 
 def init_db() -> None:
-    """Create database tables."""
+    """Create database tables and apply pending schema migrations."""
     from . import models  # noqa: F401  # Ensure models are imported
+    from .migrations import run_migrations
 
     SQLModel.metadata.create_all(engine)
+    if settings.auto_migrate:
+        run_migrations(engine)
 
 
 def get_session() -> Iterator[Session]:
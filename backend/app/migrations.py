@@ -0,0 +1,183 @@
+"""Versioned, idempotent schema migrations.
+
+``create_all`` 只负责建新表，已有表的补列、补索引由这里按版本号顺序执行：
+已执行的版本记录在 ``schema_version`` 表中；每个迁移本身也是幂等的（先检查列/索引
+是否存在），因此新库（create_all 已建好索引）与老库都能安全地重复运行。
+启动时由 :func:`app.database.init_db` 调用，也可通过 ``scripts/migrate.py`` 手动执行。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from .models import Chunk, ContentPiece, Section
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL 多节点同时启动时用 advisory lock 串行化迁移
+MIGRATION_LOCK_KEY = 7_310_250
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def add_column_if_missing(conn: Connection, table: str, column: str, ddl: str) -> None:
+    existing = {info["name"] for info in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+        logger.info("Added column %s.%s", table, column)
+
+
+def create_index_if_missing(conn: Connection, index: Index) -> None:
+    existing = {info["name"] for info in inspect(conn).get_indexes(index.table.name)}
+    if index.name not in existing:
+        index.create(conn)
+        logger.info("Created index %s on %s", index.name, index.table.name)
+
+
+def _index(model, name: str) -> Index:
+    return next(index for index in model.__table__.indexes if index.name == name)
+
+
+def _stage2_embedding_columns(conn: Connection) -> None:
+    # 原 scripts/migrate_stage2.py 的内容
+    add_column_if_missing(conn, "course", "embedding_status", "embedding_status TEXT DEFAULT 'not_started'")
+    add_column_if_missing(conn, "course", "embedding_progress", "embedding_progress FLOAT DEFAULT 0")
+    add_column_if_missing(conn, "course", "embedding_error", "embedding_error TEXT")
+
+
+def _composite_indexes(conn: Connection) -> None:
+    # 索引定义以 models 中的 __table_args__ 为准，这里只负责给老库补建
+    for model, name in (
+        (Chunk, "ix_chunk_course_section_order"),
+        (Section, "ix_section_lecture_order"),
+        (ContentPiece, "ix_contentpiece_resource_order"),
+        (ContentPiece, "ix_contentpiece_course_lecture"),
+    ):
+        create_index_if_missing(conn, _index(model, name))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "stage2_embedding_columns", _stage2_embedding_columns),
+    Migration(2, "composite_query_indexes", _composite_indexes),
+]
+
+
+def applied_versions(conn: Connection) -> Dict[int, datetime]:
+    schema_version.create(conn, checkfirst=True)
+    rows = conn.execute(select(schema_version.c.version, schema_version.c.applied_at)).all()
+    return {version: applied_at for version, applied_at in rows}
+
+
+def run_migrations(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to ``target`` (default: latest); return the versions applied.
+
+    所有待执行迁移在同一事务内完成，失败时整体回滚，版本记录不会与实际结构不一致。
+    """
+    applied: List[int] = []
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        done = applied_versions(conn)
+        for migration in MIGRATIONS:
+            if migration.version in done or (target is not None and migration.version > target):
+                continue
+            logger.info("Applying migration %04d %s", migration.version, migration.name)
+            migration.upgrade(conn)
+            conn.execute(
+                schema_version.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                )
+            )
+            applied.append(migration.version)
+    return applied
+
+
+def migration_status(engine: Engine) -> List[Dict[str, Any]]:
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    return [
+        {
+            "version": migration.version,
+            "name": migration.name,
+            "applied_at": done[migration.version].isoformat() if migration.version in done else None,
+        }
+        for migration in MIGRATIONS
+    ]
+
+
+# ---------------------------------------------------------------------------
+# 查询计划检查：路由实际发出的语句（由 assembly 中同一组构造函数生成）必须走复合索引。
+# 项目没有测试套件，由 CLI 执行。
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    statement: Any
+    expected_index: str
+    # 跨表排序（如按 Lecture.order_index）无法由单个索引满足，只检查索引是否被使用
+    allow_sort: bool = False
+
+
+def hot_queries() -> List[HotQuery]:
+    # 延迟导入：assembly 依赖 FastAPI 与服务层，启动时的迁移不需要它们
+    from .services.assembly import chunk_page_statement, chunk_window_statement, outline_statement
+
+    keyset = (1, 1, 1)
+    return [
+        HotQuery("chunk_listing", chunk_page_statement(1, 51), "ix_chunk_course_section_order"),
+        HotQuery("chunk_listing_keyset", chunk_page_statement(1, 51, after=keyset), "ix_chunk_course_section_order"),
+        HotQuery("chunk_stream_window", chunk_window_statement(1, 2000, after=keyset), "ix_chunk_course_section_order"),
+        HotQuery("course_outline", outline_statement(1), "ix_section_lecture_order", allow_sort=True),
+    ]
+
+
+def _plan_lines(conn: Connection, sql: str) -> List[str]:
+    if conn.dialect.name == "sqlite":
+        return [str(row[-1]) for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    return [str(row[0]) for row in conn.execute(text(f"EXPLAIN {sql}"))]
+
+
+def check_query_plans(engine: Engine) -> List[Dict[str, Any]]:
+    """EXPLAIN each hot query; ``ok`` means it uses the expected index without a sort step.
+
+    PostgreSQL 在小表上总会选择顺序扫描，检查时在事务内关闭 seqscan，只验证索引可用。
+    """
+    results: List[Dict[str, Any]] = []
+    with engine.connect() as conn:
+        with conn.begin():
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SET LOCAL enable_seqscan = off"))
+            for query in hot_queries():
+                sql = str(query.statement.compile(conn, compile_kwargs={"literal_binds": True}))
+                plan = _plan_lines(conn, sql)
+                joined = "\n".join(plan)
+                sorted_in_memory = "TEMP B-TREE" in joined or "Sort" in joined
+                results.append(
+                    {
+                        "query": query.name,
+                        "expected_index": query.expected_index,
+                        "ok": query.expected_index in joined and (query.allow_sort or not sorted_in_memory),
+                        "plan": plan,
+                    }
+                )
+    return results
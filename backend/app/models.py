@@ -2,10 +2,14 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy.dialects.sqlite import JSON
+from sqlalchemy import JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlmodel import Column, Field, Relationship, SQLModel
 
+# 可移植 JSON 列：PostgreSQL 上使用 JSONB，SQLite 等其他方言使用 JSON
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class ResourceType(str, Enum):
     video = "video"
@@ -51,7 +55,7 @@ class Course(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     meta: Dict[str, Any] = Field(
-        default_factory=dict, sa_column=Column("metadata", JSON, nullable=False, default={})
+        default_factory=dict, sa_column=Column("metadata", JSONType, nullable=False, default={})
     )
     embedding_status: EmbeddingStatus = Field(default=EmbeddingStatus.not_started)
     embedding_progress: float = Field(default=0.0)
@@ -67,7 +71,7 @@ class Lecture(SQLModel, table=True):
     order_index: int = Field(default=1)
     description: Optional[str] = None
     meta: Dict[str, Any] = Field(
-        default_factory=dict, sa_column=Column("metadata", JSON, nullable=False, default={})
+        default_factory=dict, sa_column=Column("metadata", JSONType, nullable=False, default={})
     )
 
     course: Optional["Course"] = Relationship(back_populates="lectures")
@@ -88,7 +92,7 @@ class Resource(SQLModel, table=True):
     retry_count: int = Field(default=0)
     error_message: Optional[str] = None
     meta: Dict[str, Any] = Field(
-        default_factory=dict, sa_column=Column("metadata", JSON, nullable=False, default={})
+        default_factory=dict, sa_column=Column("metadata", JSONType, nullable=False, default={})
     )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -107,6 +111,11 @@ class ContentSourceType(str, Enum):
 
 
 class ContentPiece(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_contentpiece_resource_order", "resource_id", "order_in_resource"),
+        Index("ix_contentpiece_course_lecture", "course_id", "lecture_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     course_id: int = Field(foreign_key="course.id", index=True)
     lecture_id: Optional[int] = Field(default=None, foreign_key="lecture.id", index=True)
@@ -120,7 +129,7 @@ class ContentPiece(SQLModel, table=True):
     page_number: Optional[int] = None
     order_in_resource: int = Field(default=0)
     meta: Dict[str, Any] = Field(
-        default_factory=dict, sa_column=Column("metadata", JSON, nullable=False, default={})
+        default_factory=dict, sa_column=Column("metadata", JSONType, nullable=False, default={})
     )
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -129,6 +138,8 @@ class ContentPiece(SQLModel, table=True):
 
 
 class Section(SQLModel, table=True):
+    __table_args__ = (Index("ix_section_lecture_order", "lecture_id", "order_in_lecture"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     course_id: int = Field(foreign_key="course.id", index=True)
     lecture_id: int = Field(foreign_key="lecture.id", index=True)
@@ -138,7 +149,7 @@ class Section(SQLModel, table=True):
     approx_start_time: Optional[float] = None
     approx_end_time: Optional[float] = None
     meta: Dict[str, Any] = Field(
-        default_factory=dict, sa_column=Column("metadata", JSON, nullable=False, default={})
+        default_factory=dict, sa_column=Column("metadata", JSONType, nullable=False, default={})
     )
 
     lecture: Optional[Lecture] = Relationship(back_populates="sections")
@@ -147,6 +158,9 @@ class Section(SQLModel, table=True):
 
 
 class Chunk(SQLModel, table=True):
+    # 与 assembly.CHUNK_ORDER 的分页/导出顺序一致
+    __table_args__ = (Index("ix_chunk_course_section_order", "course_id", "section_id", "order_in_section", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     course_id: int = Field(foreign_key="course.id", index=True)
     lecture_id: int = Field(foreign_key="lecture.id", index=True)
@@ -155,12 +169,12 @@ class Chunk(SQLModel, table=True):
     language: str = Field(default="zh")
     source_type: str = Field(default="transcript")
     source_ref: Dict[str, Any] = Field(
-        default_factory=dict, sa_column=Column(JSON, nullable=False, default={})
+        default_factory=dict, sa_column=Column(JSONType, nullable=False, default={})
     )
     order_in_section: int = Field(default=1)
     tokens_estimate: int = Field(default=0)
     meta: Dict[str, Any] = Field(
-        default_factory=dict, sa_column=Column("metadata", JSON, nullable=False, default={})
+        default_factory=dict, sa_column=Column("metadata", JSONType, nullable=False, default={})
     )
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
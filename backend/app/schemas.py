@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -41,6 +41,22 @@ class CourseRead(ORMModel):
     embedding_progress: float
     embedding_error: Optional[str]
 
+class CourseStats(BaseModel):
+    id: int
+    name: str
+    embedding_status: EmbeddingStatus
+    embedding_progress: float
+    resource_count: int
+    section_count: int
+    chunk_count: int
+    vector_count: Optional[int] = None
+    created_at: datetime
+
+
+class CourseStatsResponse(BaseModel):
+    courses: List[CourseStats]
+
+
 class LectureRead(ORMModel):
     id: int
     title: Optional[str]
@@ -79,6 +95,18 @@ class ResourceCreate(BaseModel):
     original_filename: Optional[str] = None
 
 
+class ResourceBatchItem(BaseModel):
+    resource_type: ResourceType
+    display_name: Optional[str] = None
+    source_url: Optional[str] = None
+    original_filename: Optional[str] = None
+
+
+class ResourceBatchCreate(BaseModel):
+    course_id: int
+    items: List[ResourceBatchItem] = Field(min_length=1)
+
+
 class ResourceRead(ORMModel):
     id: int
     course_id: int
@@ -94,6 +122,12 @@ class ResourceRead(ORMModel):
     created_at: datetime
     updated_at: datetime
 
+
+class ResourceBatchResponse(BaseModel):
+    course_id: int
+    items: List[ResourceRead]
+
+
 class ResourceStatusUpdate(BaseModel):
     status: ResourceStatus
     processing_stage: ProcessingStage
@@ -131,6 +165,15 @@ class SearchRequest(BaseModel):
     query: str
     top_k: int = Field(default=5, ge=1, le=20)
     filters: Optional[SearchFilters] = None
+    # vector: 仅向量；lexical: 仅 BM25 倒排索引（不经过模型）；hybrid: 两路结果做 RRF 融合
+    mode: Literal["vector", "lexical", "hybrid"] = "vector"
+    # MMR 去重：先多取 fetch_k 个向量候选，再按 mmr_lambda 平衡相关度与多样性（lexical 模式忽略）
+    diversify: bool = False
+    mmr_lambda: float = Field(default=0.5, ge=0.0, le=1.0)
+    fetch_k: Optional[int] = Field(default=None, ge=1, le=200)
+    # 延迟预算（毫秒），为空时使用服务端 search_timeout_ms；超时后 allow_partial 决定降级还是 503
+    timeout_ms: Optional[int] = Field(default=None, ge=10, le=60000)
+    allow_partial: bool = True
 
 
 class SearchResult(BaseModel):
@@ -142,6 +185,34 @@ class SearchResult(BaseModel):
 
 class SearchResponse(BaseModel):
     results: List[SearchResult]
+    partial: bool = False
+    degraded_stage: Optional[str] = None
+    timings_ms: Dict[str, float] = Field(default_factory=dict)
+    # 批量检索中单个查询失败时的错误详情（与单查询接口 HTTP 错误的 detail 相同）
+    error: Optional[Dict[str, Any]] = None
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[SearchRequest] = Field(min_length=1, max_length=32)
+
+
+class BatchSearchResponse(BaseModel):
+    results: List[SearchResponse]
+
+
+class VectorIndexConfig(BaseModel):
+    """HNSW overrides for a course collection; unset fields keep the current value."""
+
+    space: Optional[Literal["cosine", "l2", "ip"]] = None
+    m: Optional[int] = Field(default=None, ge=2)
+    construction_ef: Optional[int] = Field(default=None, ge=1)
+    search_ef: Optional[int] = Field(default=None, ge=1)
+
+
+class VectorIndexRebuildResponse(BaseModel):
+    course_id: int
+    vector_count: int
+    config: VectorIndexConfig
 
 
 class ChunkRead(ORMModel):
@@ -161,3 +232,4 @@ class ChunkRead(ORMModel):
 class Pagination(BaseModel):
     total: int
     items: List[ChunkRead]
+    next_cursor: Optional[str] = None
@@ -1,21 +1,41 @@
 """Service layer helpers for Stage 1 backend."""
 
-from . import storage
-from .assembly import assemble_course_if_ready, build_course_outline, fetch_course_chunks
-from .embedding import embed_texts
+from . import bulk, events, export, hydration, lexical, rerank, search_cache, stats, status_writer, storage
+from .assembly import (
+    assemble_course_if_ready,
+    build_course_outline,
+    course_outline_json,
+    fetch_course_chunks,
+    outline_etag,
+)
+from .embedding import embed_texts, embedding_version
 from .processing import processor
-from .resources import create_course, create_resource, retry_resource
+from .resources import create_course, create_resource, create_resources, infer_upload_type, retry_resource
 from .sections import update_section
 
 __all__ = [
     "assemble_course_if_ready",
     "build_course_outline",
+    "bulk",
+    "course_outline_json",
     "create_course",
     "create_resource",
+    "create_resources",
     "fetch_course_chunks",
     "embed_texts",
+    "embedding_version",
+    "events",
+    "export",
+    "hydration",
+    "infer_upload_type",
+    "lexical",
+    "outline_etag",
     "storage",
     "processor",
+    "rerank",
     "retry_resource",
+    "search_cache",
+    "stats",
+    "status_writer",
     "update_section",
 ]
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import base64
 import math
-from typing import Dict, Iterable, List, Sequence, Tuple
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import func
+from sqlalchemy import func, tuple_
 from sqlmodel import Session, delete, select
 
 from .. import schemas
+from . import bulk, hydration
+from .search_cache import ByteLRUCache
 from .validation import MIN_CHUNK_CHARS
 from ..models import (
     Chunk,
@@ -21,6 +25,9 @@ from ..models import (
 )
 
 
+OUTLINE_CACHE_BYTES = 8 * 1024 * 1024
+
+
 def assemble_course_if_ready(session: Session, course_id: int) -> bool:
     """Build sections & chunks when all course resources are succeeded."""
     statuses = session.exec(
@@ -44,6 +51,7 @@ def _assemble_course_structures(session: Session, course_id: int) -> None:
         select(Lecture).where(Lecture.course_id == course_id).order_by(Lecture.order_index)
     ).all()
 
+    chunks: List[Chunk] = []
     for lecture in lectures:
         lecture_pieces = [
             piece
@@ -85,9 +93,25 @@ def _assemble_course_structures(session: Session, course_id: int) -> None:
             session.flush()
             for piece in group:
                 piece.section_id = section.id
-            _build_chunks_for_section(session, section, group)
+            chunks.extend(_build_chunks_for_section(section, group))
+    # 分块统一在最后批量写入（PostgreSQL 上走 COPY）
+    bulk.insert_many(session, Chunk, chunks)
+    course = session.get(Course, course_id)
+    if course:
+        # 分页接口直接读取该计数，避免每页 COUNT(*)
+        chunk_count = session.exec(select(func.count(Chunk.id)).where(Chunk.course_id == course_id)).one()
+        course.meta = {**(course.meta or {}), "chunk_count": chunk_count}
+        bump_outline_version(course)
+        session.add(course)
     session.commit()
 
+    # chunk id 已重新生成，热点文本缓存整体失效
+    hydration.invalidate_course(course_id)
+    # 倒排索引依赖 assembly 的分块流，延迟导入避免循环依赖
+    from .lexical import build_course_index
+
+    build_course_index(session, course_id)
+
 
 def _split_into_sections(
     content_pieces: Sequence[ContentPiece],
@@ -118,8 +142,10 @@ def _split_into_sections(
     return sections
 
 
-def _build_chunks_for_section(session: Session, section: Section, pieces: Sequence[ContentPiece]) -> None:
+def _build_chunks_for_section(section: Section, pieces: Sequence[ContentPiece]) -> List[Chunk]:
+    """Group a section's pieces into unsaved chunks; the caller bulk-inserts them."""
     min_chars, max_chars = 200, 500
+    chunks: List[Chunk] = []
     current_text: List[str] = []
     chunk_piece_ids: List[int] = []
     chunk_time_ranges: List[Tuple[float, float]] = []
@@ -159,7 +185,6 @@ def _build_chunks_for_section(session: Session, section: Section, pieces: Sequen
                 last_meta.setdefault("source_types", []).extend(chunk_sources.copy())
                 if chunk_time_ranges:
                     last_chunk.source_ref["end_time"] = chunk_time_ranges[-1][1]
-                session.add(last_chunk)
             # If no previous chunk, drop this short fragment.
             current_text = []
             chunk_piece_ids = []
@@ -182,7 +207,7 @@ def _build_chunks_for_section(session: Session, section: Section, pieces: Sequen
                 tokens_estimate=max(1, math.ceil(len(text) / 4)),
                 meta=metadata,
             )
-            session.add(chunk)
+            chunks.append(chunk)
             last_chunk = chunk
             order += 1
         current_text = []
@@ -214,7 +239,30 @@ def _build_chunks_for_section(session: Session, section: Section, pieces: Sequen
             char_count = 0
 
     flush_chunk()
-    session.flush()
+    return chunks
+
+
+def bump_outline_version(course: Course) -> None:
+    """Invalidate cached outlines/ETags after structural edits; caller commits."""
+    meta = course.meta or {}
+    course.meta = {**meta, "outline_version": int(meta.get("outline_version", 0)) + 1}
+    course.updated_at = datetime.utcnow()
+
+
+def outline_etag(course: Course) -> str:
+    # 课程行本身（嵌入状态/进度）也在 outline 中，updated_at 与 outline_version 共同决定内容
+    version = (course.meta or {}).get("outline_version", 0)
+    return f'"{course.id}-{version}-{int(course.updated_at.timestamp() * 1_000_000)}"'
+
+
+def outline_statement(course_id: int):
+    """Lectures with their sections in outline order (also EXPLAINed by ``migrations.check_query_plans``)."""
+    return (
+        select(Lecture, Section)
+        .outerjoin(Section, Section.lecture_id == Lecture.id)
+        .where(Lecture.course_id == course_id)
+        .order_by(Lecture.order_index, Lecture.id, Section.order_in_lecture)
+    )
 
 
 def build_course_outline(session: Session, course_id: int) -> schemas.CourseOutline:
@@ -222,23 +270,16 @@ def build_course_outline(session: Session, course_id: int) -> schemas.CourseOutl
     if not course:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
 
-    lectures = session.exec(
-        select(Lecture).where(Lecture.course_id == course_id).order_by(Lecture.order_index)
-    ).all()
+    rows = session.exec(outline_statement(course_id)).all()
 
     lecture_outlines: List[schemas.LectureOutline] = []
-    for lecture in lectures:
-        sections = session.exec(
-            select(Section)
-            .where(Section.lecture_id == lecture.id)
-            .order_by(Section.order_in_lecture)
-        ).all()
-        lecture_outlines.append(
-            schemas.LectureOutline(
-                lecture=schemas.LectureRead.model_validate(lecture),
-                sections=[schemas.SectionRead.model_validate(section) for section in sections],
+    for lecture, section in rows:
+        if not lecture_outlines or lecture_outlines[-1].lecture.id != lecture.id:
+            lecture_outlines.append(
+                schemas.LectureOutline(lecture=schemas.LectureRead.model_validate(lecture), sections=[])
             )
-        )
+        if section is not None:
+            lecture_outlines[-1].sections.append(schemas.SectionRead.model_validate(section))
 
     return schemas.CourseOutline(
         course=schemas.CourseRead.model_validate(course),
@@ -246,18 +287,135 @@ def build_course_outline(session: Session, course_id: int) -> schemas.CourseOutl
     )
 
 
+def _outline_size(value: bytes) -> int:
+    return len(value) + 64
+
+
+outline_cache = ByteLRUCache(OUTLINE_CACHE_BYTES, _outline_size)
+
+
+def course_outline_json(session: Session, course: Course) -> Tuple[str, bytes]:
+    """Return ``(etag, serialized outline)``, reusing the cached body while the ETag is unchanged."""
+    etag = outline_etag(course)
+    key = (course.id, etag)
+    body = outline_cache.get(key)
+    if body is None:
+        body = build_course_outline(session, course.id).model_dump_json(by_alias=True).encode("utf-8")
+        outline_cache.discard_where(lambda cached: cached[0] == course.id)
+        outline_cache.put(key, body)
+    return etag, body
+
+
+CHUNK_ORDER = (Chunk.section_id, Chunk.order_in_section, Chunk.id)
+
+
+def encode_chunk_cursor(chunk: Chunk) -> str:
+    raw = f"{chunk.section_id}:{chunk.order_in_section}:{chunk.id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_chunk_cursor(cursor: str) -> Tuple[int, int, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        section_id, order_in_section, chunk_id = base64.urlsafe_b64decode(padded).decode("ascii").split(":")
+        return int(section_id), int(order_in_section), int(chunk_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "invalid_cursor"},
+        ) from exc
+
+
+def course_chunk_count(session: Session, course: Course) -> int:
+    """Chunk total maintained in ``course.meta`` by assembly; counted once for older courses."""
+    cached = (course.meta or {}).get("chunk_count")
+    if cached is not None:
+        return int(cached)
+    total = session.exec(select(func.count(Chunk.id)).where(Chunk.course_id == course.id)).one()
+    course.meta = {**(course.meta or {}), "chunk_count": total}
+    session.add(course)
+    session.commit()
+    return total
+
+
+def chunk_page_statement(
+    course_id: int,
+    limit: int,
+    offset: int = 0,
+    after: Optional[Tuple[int, int, int]] = None,
+):
+    """Full chunk rows in outline order, seeking past ``after`` (keyset) or skipping ``offset``."""
+    statement = select(Chunk).where(Chunk.course_id == course_id)
+    if after is not None:
+        statement = statement.where(tuple_(*CHUNK_ORDER) > tuple_(*after))
+    elif offset:
+        statement = statement.offset(offset)
+    return statement.order_by(*CHUNK_ORDER).limit(limit)
+
+
 def fetch_course_chunks(
     session: Session,
     course_id: int,
     limit: int,
-    offset: int,
-) -> Tuple[int, List[Chunk]]:
-    total = session.exec(select(func.count(Chunk.id)).where(Chunk.course_id == course_id)).one()
-    items = session.exec(
-        select(Chunk)
-        .where(Chunk.course_id == course_id)
-        .order_by(Chunk.section_id, Chunk.order_in_section)
-        .offset(offset)
-        .limit(limit)
-    ).all()
-    return total, items
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[int, List[Chunk], Optional[str]]:
+    """Return ``(total, page, next_cursor)`` in outline order.
+
+    ``cursor`` seeks past the last ``(section_id, order_in_section, id)`` key so
+    deep pages cost the same as the first; ``offset`` is kept for old clients.
+    """
+    course = session.get(Course, course_id)
+    if not course:
+        return 0, [], None
+    after = decode_chunk_cursor(cursor) if cursor else None
+    # 多取一行用于判断是否还有下一页
+    items = session.exec(chunk_page_statement(course_id, limit + 1, offset, after)).all()
+    next_cursor = encode_chunk_cursor(items[limit - 1]) if len(items) > limit else None
+    return course_chunk_count(session, course), items[:limit], next_cursor
+
+
+# Columns needed to embed a chunk; JSON ``meta``/``source_ref`` are left out on purpose.
+CHUNK_STREAM_COLUMNS = (Chunk.id, Chunk.text, Chunk.lecture_id, Chunk.section_id, Chunk.source_type)
+CHUNK_WINDOW_KEY_COLUMNS = (
+    Chunk.section_id.label("key_section_id"),
+    Chunk.order_in_section.label("key_order_in_section"),
+    Chunk.id.label("key_id"),
+)
+
+
+def chunk_window_statement(
+    course_id: int,
+    window_size: int,
+    columns: Sequence[Any] = CHUNK_STREAM_COLUMNS,
+    after: Optional[Tuple[int, int, int]] = None,
+):
+    """One keyset window of ``columns`` plus the ordering key, for :func:`iter_course_chunk_windows`."""
+    statement = select(*columns, *CHUNK_WINDOW_KEY_COLUMNS).where(Chunk.course_id == course_id)
+    if after is not None:
+        statement = statement.where(tuple_(*CHUNK_ORDER) > tuple_(*after))
+    return statement.order_by(*CHUNK_ORDER).limit(window_size)
+
+
+def iter_course_chunk_windows(
+    session: Session,
+    course_id: int,
+    window_size: int,
+    columns: Sequence[Any] = CHUNK_STREAM_COLUMNS,
+) -> Iterator[List[Any]]:
+    """Yield a course's chunk rows in outline order, one keyset window at a time.
+
+    Each window is an independent ``LIMIT`` query seeking past the last
+    ``(section_id, order_in_section, id)`` key, so only one window is held in
+    memory and callers may commit on the same session between windows.
+    """
+    last_key: Optional[Tuple[int, int, int]] = None
+    while True:
+        rows = session.exec(chunk_window_statement(course_id, window_size, columns, last_key)).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < window_size:
+            return
+        tail = rows[-1]
+        last_key = (tail.key_section_id, tail.key_order_in_section, tail.key_id)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+# 阻塞阶段（模型前向、向量库查询）放到独立线程执行，请求线程只等待剩余预算；
+# 超时后请求立即返回，后台任务跑完结果被丢弃（其副作用如查询向量缓存仍然保留）
+_stage_executor = ThreadPoolExecutor(max_workers=settings.search_stage_workers, thread_name_prefix="search-stage")
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when a stage cannot finish within the remaining request budget."""
+
+    def __init__(self, stage: str) -> None:
+        super().__init__(f"deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """Per-request latency budget that also records how long each stage took."""
+
+    def __init__(self, budget_ms: int) -> None:
+        self.budget_ms = budget_ms
+        self._start = perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)."""
+        return max(0.0, self.budget_ms / 1000 - (perf_counter() - self._start))
+
+    def check(self, stage: str) -> None:
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(stage)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0.0) + (perf_counter() - start) * 1000, 2)
+
+    def run(self, stage: str, fn: Callable[..., T], *args, executor: Optional[Any] = None, **kwargs) -> T:
+        """Run a blocking call off-thread and wait at most the remaining budget for it.
+
+        ``executor`` defaults to the shared stage pool; model calls pass the
+        bounded inference executor so they count against its admission limit.
+        """
+        self.check(stage)
+        with self.stage(stage):
+            future = (executor or _stage_executor).submit(fn, *args, **kwargs)
+            try:
+                return future.result(timeout=self.remaining())
+            except FutureTimeout as exc:
+                future.cancel()
+                logger.warning("Search stage %s exceeded budget of %s ms", stage, self.budget_ms)
+                raise DeadlineExceeded(stage) from exc
+
+    def elapsed_ms(self) -> float:
+        return round((perf_counter() - self._start) * 1000, 2)
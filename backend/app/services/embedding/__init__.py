@@ -1,3 +1,3 @@
-from .embedder import embed_texts
+from .embedder import compress_embeddings, embed_texts, embedding_dimension, embedding_version, encode_texts
 
-__all__ = ["embed_texts"]
+__all__ = ["compress_embeddings", "embed_texts", "embedding_dimension", "embedding_version", "encode_texts"]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from time import perf_counter
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 import torch
 import torch.nn.functional as F
@@ -19,16 +19,40 @@ def _chunk(items: List[str], size: int) -> Iterable[List[str]]:
         yield items[idx : idx + size]
 
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
-    """将文本批量转换为向量，自动按 batch 切分。"""
-    if not texts:
-        return []
+def embedding_version() -> str:
+    """Identify the vector space produced by the current model/dim/dtype settings."""
+    dim = settings.embedding_dim or "full"
+    return f"{settings.embedding_model_name}:{dim}:{settings.embedding_dtype}"
+
+
+def embedding_dimension() -> int:
+    """Output dimension of :func:`embed_texts`, read from the model config (no forward pass)."""
+    _, model, _ = load_embedding_components()
+    full = int(model.config.hidden_size)
+    return min(settings.embedding_dim, full) if settings.embedding_dim else full
+
+
+def compress_embeddings(
+    embeddings: torch.Tensor,
+    dim: Optional[int] = None,
+    dtype: Optional[str] = None,
+) -> torch.Tensor:
+    """Matryoshka 截断到前 dim 维并重新归一化，可选量化为 float16 精度。"""
+    dim = dim if dim is not None else settings.embedding_dim
+    dtype = dtype or settings.embedding_dtype
+    if dim and dim < embeddings.shape[1]:
+        embeddings = F.normalize(embeddings[:, :dim], p=2, dim=1)
+    if dtype == "float16":
+        embeddings = embeddings.half().float()
+    return embeddings
+
 
+def encode_texts(texts: List[str]) -> torch.Tensor:
+    """Run the model and return full-dimension, L2-normalized float32 embeddings on CPU."""
     cleaned = [text or "" for text in texts]
     tokenizer, model, device = load_embedding_components()
     max_batch = settings.embedding_batch_size
-    vectors: List[List[float]] = []
-    start = perf_counter()
+    outputs_cpu: List[torch.Tensor] = []
 
     for batch in _chunk(cleaned, max_batch):
         encoded = tokenizer(
@@ -52,8 +76,18 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
             embeddings = summed / counts
 
         embeddings = F.normalize(embeddings, p=2, dim=1)
-        vectors.extend(embeddings.cpu().tolist())
+        outputs_cpu.append(embeddings.float().cpu())
+
+    return torch.cat(outputs_cpu, dim=0)
+
 
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """将文本批量转换为向量，自动按 batch 切分。"""
+    if not texts:
+        return []
+
+    start = perf_counter()
+    vectors = compress_embeddings(encode_texts(texts)).tolist()
     elapsed = (perf_counter() - start) * 1000
     logger.info("Embedded %s texts in %.2f ms", len(texts), elapsed)
     return vectors
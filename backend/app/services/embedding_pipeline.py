@@ -1,55 +1,140 @@
 from __future__ import annotations
 
+import hashlib
 import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from time import perf_counter, sleep
-from typing import Iterable, List, Sequence
+from typing import Any, Deque, Dict, List, Sequence, Tuple
 
+from sqlalchemy import func
 from sqlmodel import Session, select
 
+from ..config import get_settings
 from ..models import Chunk, Course, EmbeddingStatus
-from .embedding import embed_texts
-from .vectorstore import VectorStoreError, VectorStoreItem, upsert_chunks
+from . import events, search_cache, status_writer
+from .assembly import iter_course_chunk_windows
+from .stats import refresh_vector_count
+from .embedding import embed_texts, embedding_dimension, embedding_version
+from .vectorstore import (
+    VectorStoreError,
+    VectorStoreItem,
+    course_vector_space,
+    delete_course_collection,
+    fetch_course_fingerprints,
+    upsert_chunks,
+)
 
 logger = logging.getLogger(__name__)
 
 MAX_EMBED_RETRIES = 3
+# 指数退避：第 n 次重试前等待 base * 2**(n-1) 秒，最多 max 秒
+EMBED_RETRY_BASE_DELAY = 0.5
+EMBED_RETRY_MAX_DELAY = 8.0
+# 记录到 course.meta 的失败 chunk 数上限
+MAX_RECORDED_FAILURES = 200
+# 嵌入与写库流水线：最多允许多少个已嵌入批次排队等待写入向量库
+UPSERT_QUEUE_DEPTH = 1
+# 进度写库的最小间隔（秒），避免每个批次都 commit
+PROGRESS_COMMIT_INTERVAL = 2.0
 
 
-def _chunk_batches(items: Sequence[Chunk], size: int) -> Iterable[Sequence[Chunk]]:
-    for idx in range(0, len(items), size):
-        yield items[idx : idx + size]
+def _text_hash(text: str | None) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _build_payload(
+    course_id: int,
+    batch: Sequence[Any],
+    vectors: List[List[float]],
+    version: str,
+) -> List[VectorStoreItem]:
+    store_documents = get_settings().vector_store_documents
+    payload = []
+    for row, vector in zip(batch, vectors):
+        metadata = {
+            "course_id": course_id,
+            "lecture_id": row.lecture_id,
+            "section_id": row.section_id,
+            "source_type": row.source_type,
+            "embedding_version": version,
+            "text_hash": _text_hash(row.text),
+        }
+        metadata = {k: v for k, v in metadata.items() if v is not None}
+        payload.append(
+            VectorStoreItem(
+                chunk_id=row.id,
+                text=row.text if store_documents else None,
+                vector=vector,
+                metadata=metadata,
+            )
+        )
+    return payload
 
 
 def run_course_embedding(session: Session, course_id: int, batch_size: int) -> None:
-    """Embed all chunks for a course and push them to the vector store."""
+    """Embed all chunks for a course and push them to the vector store.
+
+    Chunk rows are streamed in keyset windows of ``batch_size`` with only the
+    columns the vector store needs, so memory stays flat for large courses.
+    Upserts run on a single background thread so that embedding batch N+1
+    overlaps the vector store write of batch N; at most
+    ``UPSERT_QUEUE_DEPTH`` batches wait for the writer at any time.
+
+    Chunks whose stored vector already carries the current embedding
+    version and text hash are skipped, so a rerun after a failure only
+    embeds what is missing; fingerprints are looked up per window, never
+    for the whole course at once. A collection built for a different
+    version or dimension is dropped first, so changing ``embedding_dim``
+    re-embeds cleanly.
+    """
     course = session.get(Course, course_id)
     if not course:
         raise ValueError(f"Course {course_id} not found")
 
-    chunks: List[Chunk] = session.exec(
-        select(Chunk)
-        .where(Chunk.course_id == course_id)
-        .order_by(Chunk.section_id, Chunk.order_in_section, Chunk.id)
-    ).all()
-    if not chunks:
+    total = session.exec(select(func.count(Chunk.id)).where(Chunk.course_id == course_id)).one()
+    if not total:
         _mark_failed(session, course, "No chunks available for embedding")
         return
 
-    logger.info("Starting embedding pipeline for course %s with %s chunks", course_id, len(chunks))
+    version = embedding_version()
+    reusable = _prepare_collection(course_id, version)
+    logger.info(
+        "Starting embedding pipeline for course %s with %s chunks (reusing stored vectors: %s)",
+        course_id,
+        total,
+        reusable,
+    )
     _mark_running(session, course)
 
-    total = len(chunks)
     processed = 0
     success_vectors = 0
     batches = 0
+    skipped = 0
+    job_start = perf_counter()
+    embed_ms = 0.0
+    last_progress_commit = perf_counter()
+    failures: List[Dict[str, Any]] = []
+    pending: Deque[Tuple[Future, Sequence[Any]]] = deque()
+    upsert_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"course-{course_id}-upsert")
     try:
-        for batch in _chunk_batches(chunks, batch_size):
+        for window in iter_course_chunk_windows(session, course_id, batch_size):
+            existing = _window_fingerprints(course_id, window, version) if reusable else {}
+            batch = [row for row in window if existing.get(row.id) != _text_hash(row.text)]
+            skipped += len(window) - len(batch)
+            processed += len(window) - len(batch)
+            if not batch:
+                continue
             batches += 1
-            texts = [chunk.text or "" for chunk in batch]
             batch_start = perf_counter()
-            vectors = _embed_with_retry(texts)
+            embedded, vectors, batch_failures = _embed_isolating_failures(batch)
+            if len(batch) > 1 and len(batch_failures) == len(batch):
+                # 整批每条都失败更像是模型/设备故障，而非个别坏数据
+                raise RuntimeError(f"embedding_batch_failed: {batch_failures[0]['error']}")
+            failures.extend(batch_failures)
             embed_elapsed = (perf_counter() - batch_start) * 1000
+            embed_ms += embed_elapsed
             logger.info(
                 "Embedded batch %s for course %s with %s chunks in %.2f ms",
                 batches,
@@ -57,57 +142,119 @@ def run_course_embedding(session: Session, course_id: int, batch_size: int) -> N
                 len(batch),
                 embed_elapsed,
             )
-            payload = []
-            for chunk_obj, vector in zip(batch, vectors):
-                if chunk_obj.id is None:
-                    continue
-                metadata = {
-                    "course_id": chunk_obj.course_id,
-                    "lecture_id": chunk_obj.lecture_id,
-                    "section_id": chunk_obj.section_id,
-                    "source_type": chunk_obj.source_type,
-                }
-                metadata = {k: v for k, v in metadata.items() if v is not None}
-                payload.append(
-                    VectorStoreItem(
-                        chunk_id=chunk_obj.id,
-                        text=chunk_obj.text,
-                        vector=vector,
-                        metadata=metadata,
-                    )
+            payload = _build_payload(course_id, embedded, vectors, version)
+            pending.append((upsert_executor.submit(upsert_chunks, course_id, payload), batch))
+            while len(pending) > UPSERT_QUEUE_DEPTH:
+                future, done_batch = pending.popleft()
+                success_vectors += future.result()
+                processed += len(done_batch)
+
+            if perf_counter() - last_progress_commit >= PROGRESS_COMMIT_INTERVAL:
+                _update_progress(course, processed, total)
+                last_progress_commit = perf_counter()
+                logger.info(
+                    "Course %s embedding progress %s/%s chunks (%.2f%%)",
+                    course_id,
+                    processed,
+                    total,
+                    course.embedding_progress,
                 )
-            upsert_chunks(course_id, payload)
-            processed += len(batch)
-            success_vectors += len(payload)
-            _update_progress(session, course, processed, total)
-            logger.info(
-                "Finished batch %s for course %s (%s/%s chunks, %.2f%%)",
-                batches,
-                course_id,
-                processed,
-                total,
-                course.embedding_progress,
-            )
+
+        while pending:
+            future, done_batch = pending.popleft()
+            success_vectors += future.result()
+            processed += len(done_batch)
     except VectorStoreError as exc:
         logger.exception("Embedding pipeline for course %s failed due to vector store error: %s", course_id, exc)
+        _cancel_pending(pending)
         session.rollback()
-        _mark_failed(session, session.get(Course, course_id), f"vector_store_error: {exc}")
+        _mark_failed(session, session.get(Course, course_id), f"vector_store_error: {exc}", processed, total)
         return
     except Exception as exc:
         logger.exception("Embedding pipeline for course %s failed: %s", course_id, exc)
+        _cancel_pending(pending)
         session.rollback()
-        _mark_failed(session, session.get(Course, course_id), str(exc))
+        _mark_failed(session, session.get(Course, course_id), str(exc), processed, total)
         return
+    finally:
+        upsert_executor.shutdown(wait=True)
 
-    _mark_done(session, course)
+    _mark_done(session, course, failures)
     logger.info(
-        "Embedding pipeline for course %s finished: %s chunks embedded across %s batches",
+        "Embedding pipeline for course %s finished: %s chunks embedded across %s batches "
+        "in %.2f ms (model time %.2f ms), %s unchanged chunks reused, %s chunks skipped after errors",
         course_id,
         success_vectors,
         batches,
+        (perf_counter() - job_start) * 1000,
+        embed_ms,
+        skipped,
+        len(failures),
     )
 
 
+def _target_dimension() -> int | None:
+    """Dimension the current model/settings produce, from the model config rather than a probe forward."""
+    try:
+        return embedding_dimension()
+    except Exception as exc:  # pragma: no cover - 模型不可用时交给后续批次报错
+        logger.warning("Cannot determine embedding dimension: %s", exc)
+        return None
+
+
+def _prepare_collection(course_id: int, version: str) -> bool:
+    """Return whether stored vectors may be reused, recreating a stale collection first.
+
+    集合中的向量要么来自同一 embedding_version（失败后续跑），要么整体已被删除重建，
+    因此抽样一条即可判断：版本或维度与当前模型输出不一致（例如调整了 ``embedding_dim``）
+    时整体删除后从头重建，不做断点续跑。逐条的复用判断在各窗口内按指纹完成。
+    """
+    try:
+        space = course_vector_space(course_id)
+    except VectorStoreError as exc:
+        logger.warning("Cannot read existing vectors for course %s, re-embedding all: %s", course_id, exc)
+        return False
+    if space is None:
+        return False
+    stored_version, stored_dim = space
+    target_dim = _target_dimension()
+    dim_mismatch = target_dim is not None and stored_dim != target_dim
+    if stored_version == version and not dim_mismatch:
+        return True
+
+    logger.warning(
+        "Course %s collection holds version %s with dim %s; recreating it for %s (dim %s)",
+        course_id,
+        stored_version,
+        stored_dim,
+        version,
+        target_dim,
+    )
+    try:
+        # delete 同时清掉进程内的集合句柄与计数缓存
+        delete_course_collection(course_id)
+    except VectorStoreError as exc:
+        logger.error("Failed to drop stale collection for course %s: %s", course_id, exc)
+    search_cache.invalidate_course(course_id)
+    return False
+
+
+def _window_fingerprints(course_id: int, window: Sequence[Any], version: str) -> Dict[int, str]:
+    """``{chunk_id: text_hash}`` of this window's vectors stored under ``version``."""
+    try:
+        fingerprints = fetch_course_fingerprints(course_id, [row.id for row in window])
+    except VectorStoreError as exc:
+        logger.warning("Cannot read fingerprints for course %s, re-embedding window: %s", course_id, exc)
+        return {}
+    return {chunk_id: text_hash for chunk_id, (stored, text_hash) in fingerprints.items() if stored == version}
+
+
+def _cancel_pending(pending: Deque[Tuple[Future, Sequence[Any]]]) -> None:
+    while pending:
+        future, _ = pending.popleft()
+        future.cancel()
+
+
 def _mark_running(session: Session, course: Course) -> None:
     course.embedding_status = EmbeddingStatus.running
     course.embedding_progress = 0.0
@@ -115,39 +262,78 @@ def _mark_running(session: Session, course: Course) -> None:
     course.updated_at = datetime.utcnow()
     session.add(course)
     session.commit()
+    events.publish_embedding(course)
 
 
-def _update_progress(session: Session, course: Course, processed: int, total: int) -> None:
+def _update_progress(course: Course, processed: int, total: int) -> None:
     progress = 100.0 if total == 0 else round(processed / total * 100, 2)
-    course.embedding_progress = min(progress, 100.0)
-    course.updated_at = datetime.utcnow()
-    session.add(course)
-    session.commit()
+    # 进度走串行写线程，批间不再各自提交；只写这两列，不碰 course.meta。
+    # 续跑依据的是向量库里的指纹，不需要另存断点
+    values: Dict[str, Any] = {"embedding_progress": min(progress, 100.0), "updated_at": datetime.utcnow()}
+    # 推送等写线程提交之后，负载按新进度预先算好
+    course_id = course.id
+    payload = {**events.embedding_payload(course), "progress": values["embedding_progress"]}
+    status_writer.apply(
+        course,
+        on_commit=lambda: events.publish_course(course_id, "embedding", payload),
+        **values,
+    )
+
+
+def _reload_after_flush(session: Session, course: Course) -> None:
+    """Wait for queued status writes, then re-read the row so meta edits made elsewhere are kept."""
+    if not status_writer.flush():
+        logger.warning("Some progress updates for course %s were not persisted", course.id)
+    session.refresh(course)
 
 
-def _mark_done(session: Session, course: Course) -> None:
+def _mark_done(session: Session, course: Course, failures: List[Dict[str, Any]] | None = None) -> None:
+    _reload_after_flush(session, course)
     course.embedding_status = EmbeddingStatus.done
     course.embedding_progress = 100.0
-    course.embedding_error = None
+    course.embedding_error = f"{len(failures)} chunks failed to embed" if failures else None
+    meta = {
+        k: v
+        for k, v in (course.meta or {}).items()
+        if k not in {"embedding_checkpoint", "embedding_failures"}
+    }
+    meta["embedding_version"] = embedding_version()
+    if failures:
+        meta["embedding_failures"] = failures[:MAX_RECORDED_FAILURES]
+    course.meta = meta
+    refresh_vector_count(course)
     course.updated_at = datetime.utcnow()
     session.add(course)
     session.commit()
+    search_cache.invalidate_course(course.id)
+    events.publish_embedding(course)
 
 
-def _mark_failed(session: Session, course: Course | None, error: str) -> None:
+def _mark_failed(
+    session: Session,
+    course: Course | None,
+    error: str,
+    processed: int = 0,
+    total: int = 0,
+) -> None:
     if not course:
         return
+    _reload_after_flush(session, course)
     course.embedding_status = EmbeddingStatus.failed
-    course.embedding_progress = 0.0
+    # 保留已写入向量库的进度，重跑时会跳过这些 chunk
+    course.embedding_progress = round(processed / total * 100, 2) if total else 0.0
     course.embedding_error = error
+    # 任务开头可能已删除旧集合，失败时同样刷新条数
+    refresh_vector_count(course)
     course.updated_at = datetime.utcnow()
     session.add(course)
     session.commit()
+    events.publish_embedding(course)
 
 
-def _embed_with_retry(texts: List[str]) -> List[List[float]]:
+def _embed_with_retry(texts: List[str], attempts: int = MAX_EMBED_RETRIES) -> List[List[float]]:
     last_exc: Exception | None = None
-    for attempt in range(1, MAX_EMBED_RETRIES + 1):
+    for attempt in range(1, attempts + 1):
         try:
             return embed_texts(texts)
         except Exception as exc:  # pragma: no cover - defensive logging
@@ -155,10 +341,40 @@ def _embed_with_retry(texts: List[str]) -> List[List[float]]:
             logger.warning(
                 "Embedding batch failed attempt %s/%s: %s",
                 attempt,
-                MAX_EMBED_RETRIES,
+                attempts,
                 exc,
             )
-            if attempt < MAX_EMBED_RETRIES:
-                sleep(0.5)
+            if attempt < attempts:
+                sleep(min(EMBED_RETRY_BASE_DELAY * 2 ** (attempt - 1), EMBED_RETRY_MAX_DELAY))
     assert last_exc is not None
     raise RuntimeError("embedding_batch_failed") from last_exc
+
+
+def _embed_isolating_failures(
+    batch: Sequence[Any],
+    attempts: int = MAX_EMBED_RETRIES,
+) -> Tuple[List[Any], List[List[float]], List[Dict[str, Any]]]:
+    """Embed a batch, bisecting on failure to isolate the offending chunks.
+
+    The full batch gets ``attempts`` tries with exponential backoff for
+    transient errors; sub-batches produced by bisection get a single try.
+    Returns the embedded rows, their vectors and ``{chunk_id, error}``
+    records for chunks that could not be embedded.
+    """
+    try:
+        vectors = _embed_with_retry([row.text or "" for row in batch], attempts=attempts)
+        return list(batch), vectors, []
+    except RuntimeError as exc:
+        if len(batch) == 1:
+            cause = exc.__cause__ or exc
+            logger.warning("Chunk %s failed to embed, skipping: %s", batch[0].id, cause)
+            return [], [], [{"chunk_id": batch[0].id, "error": str(cause)[:500]}]
+
+    mid = len(batch) // 2
+    left_rows, left_vectors, left_failures = _embed_isolating_failures(batch[:mid], attempts=1)
+    right_rows, right_vectors, right_failures = _embed_isolating_failures(batch[mid:], attempts=1)
+    return (
+        left_rows + right_rows,
+        left_vectors + right_vectors,
+        left_failures + right_failures,
+    )
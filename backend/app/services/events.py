@@ -0,0 +1,180 @@
+"""In-process event bus for per-course progress (resource stages, embedding progress).
+
+后台 worker 线程发布事件，SSE 连接在事件循环中订阅；发布端通过
+``call_soon_threadsafe`` 投递，既不阻塞 worker 也不需要轮询数据库。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from ..models import Course, Resource
+
+logger = logging.getLogger(__name__)
+
+# 每门课程保留最近的事件，用于 SSE 断线重连时按 Last-Event-ID 补发
+REPLAY_BUFFER_SIZE = 200
+SUBSCRIBER_QUEUE_SIZE = 500
+
+
+@dataclass
+class CourseEvent:
+    id: int
+    course_id: int
+    type: str
+    data: Dict[str, Any]
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.queue: "asyncio.Queue[CourseEvent]" = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, event: CourseEvent) -> None:
+        # 在事件循环线程内执行；慢客户端丢弃最旧事件而不是拖慢发布方
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class EventBus:
+    """Per-course event fan-out with a bounded replay buffer.
+
+    事件 id 按课程连续递增，并带上进程级 ``epoch``：重启后 id 从 1 重新计数，
+    客户端携带的旧 epoch 会被识别出来，改为发送快照。
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.epoch = os.urandom(4).hex()
+        self._last_ids: Dict[int, int] = {}
+        self._subscribers: Dict[int, Set[_Subscriber]] = {}
+        self._recent: Dict[int, Deque[CourseEvent]] = {}
+
+    def format_id(self, event: CourseEvent) -> str:
+        return f"{self.epoch}-{event.id}"
+
+    def parse_id(self, value: Optional[str]) -> Optional[int]:
+        """Return the per-course sequence from a ``Last-Event-ID`` issued by this process, else None."""
+        epoch, _, seq = (value or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def publish(self, course_id: int, event_type: str, data: Dict[str, Any]) -> CourseEvent:
+        with self._lock:
+            event_id = self._last_ids.get(course_id, 0) + 1
+            self._last_ids[course_id] = event_id
+            event = CourseEvent(id=event_id, course_id=course_id, type=event_type, data=data)
+            self._recent.setdefault(course_id, deque(maxlen=REPLAY_BUFFER_SIZE)).append(event)
+            subscribers = list(self._subscribers.get(course_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+            except RuntimeError:  # 事件循环已关闭
+                self._discard(course_id, subscriber)
+        return event
+
+    def subscribe(self, course_id: int, last_event_id: Optional[int] = None) -> Tuple[_Subscriber, bool]:
+        """Register a subscriber on the running loop.
+
+        Returns ``(subscriber, resumed)``. ``resumed`` is True only when the
+        replay buffer still holds every event after ``last_event_id``; those
+        events are pre-filled into the queue. Otherwise nothing is replayed
+        and the caller must send a fresh snapshot.
+        """
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(course_id, set()).add(subscriber)
+            latest = self._last_ids.get(course_id, 0)
+            recent = self._recent.get(course_id) or ()
+            resumed = False
+            backlog: List[CourseEvent] = []
+            if last_event_id is not None and last_event_id <= latest:
+                # 缓冲区最旧事件必须不晚于 last_event_id + 1，否则中间有事件已被淘汰
+                oldest = recent[0].id if recent else latest + 1
+                resumed = oldest <= last_event_id + 1
+                if resumed:
+                    backlog = [event for event in recent if event.id > last_event_id]
+        for event in backlog:
+            subscriber.offer(event)
+        return subscriber, resumed
+
+    def unsubscribe(self, course_id: int, subscriber: _Subscriber) -> None:
+        self._discard(course_id, subscriber)
+
+    def _discard(self, course_id: int, subscriber: _Subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(course_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(course_id, None)
+
+    def subscriber_count(self, course_id: Optional[int] = None) -> int:
+        with self._lock:
+            if course_id is not None:
+                return len(self._subscribers.get(course_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+bus = EventBus()
+
+
+def resource_payload(resource: Resource) -> Dict[str, Any]:
+    return {
+        "resource_id": resource.id,
+        "status": resource.status.value,
+        "processing_stage": resource.processing_stage.value,
+        "error_message": resource.error_message,
+    }
+
+
+def embedding_payload(course: Course) -> Dict[str, Any]:
+    return {
+        "status": course.embedding_status.value,
+        "progress": course.embedding_progress,
+        "error": course.embedding_error,
+    }
+
+
+def publish_resource(resource: Resource) -> None:
+    """Publish a resource status/stage transition (call after the commit)."""
+    try:
+        bus.publish(resource.course_id, "resource", resource_payload(resource))
+    except Exception as exc:  # pragma: no cover - 事件推送失败不影响主流程
+        logger.warning("Failed to publish resource event for %s: %s", resource.id, exc)
+
+
+def publish_embedding(course: Course) -> None:
+    """Publish the course's embedding status/progress (call after the commit)."""
+    try:
+        bus.publish(course.id, "embedding", embedding_payload(course))
+    except Exception as exc:  # pragma: no cover - 事件推送失败不影响主流程
+        logger.warning("Failed to publish embedding event for course %s: %s", course.id, exc)
+
+
+def publish_course(course_id: int, event_type: str, data: Optional[Dict[str, Any]] = None) -> None:
+    try:
+        bus.publish(course_id, event_type, data or {})
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Failed to publish %s event for course %s: %s", event_type, course_id, exc)
+
+
+def snapshot(course: Course, resources: List[Resource]) -> Dict[str, Any]:
+    """Current state sent as the first SSE event so clients need no initial poll."""
+    return {
+        "embedding": embedding_payload(course),
+        "resources": [resource_payload(resource) for resource in resources],
+    }
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import logging
+import zlib
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlmodel import Session, select
+
+from ..database import session_context
+from ..models import Chunk, ContentPiece
+from .assembly import iter_course_chunk_windows
+
+logger = logging.getLogger(__name__)
+
+EXPORT_WINDOW_SIZE = 2000
+
+# 导出字段名 -> 列；字段名与 API 返回保持一致（meta 列对外叫 metadata）
+EXPORT_FIELDS: Dict[str, Dict[str, Any]] = {
+    "chunks": {
+        "id": Chunk.id,
+        "course_id": Chunk.course_id,
+        "lecture_id": Chunk.lecture_id,
+        "section_id": Chunk.section_id,
+        "text": Chunk.text,
+        "language": Chunk.language,
+        "source_type": Chunk.source_type,
+        "source_ref": Chunk.source_ref,
+        "order_in_section": Chunk.order_in_section,
+        "tokens_estimate": Chunk.tokens_estimate,
+        "metadata": Chunk.meta,
+        "created_at": Chunk.created_at,
+    },
+    "content_pieces": {
+        "id": ContentPiece.id,
+        "course_id": ContentPiece.course_id,
+        "lecture_id": ContentPiece.lecture_id,
+        "resource_id": ContentPiece.resource_id,
+        "section_id": ContentPiece.section_id,
+        "source_type": ContentPiece.source_type,
+        "text": ContentPiece.text,
+        "language": ContentPiece.language,
+        "raw_start_time": ContentPiece.raw_start_time,
+        "raw_end_time": ContentPiece.raw_end_time,
+        "page_number": ContentPiece.page_number,
+        "order_in_resource": ContentPiece.order_in_resource,
+        "metadata": ContentPiece.meta,
+        "created_at": ContentPiece.created_at,
+    },
+}
+
+
+def resolve_fields(kind: str, fields: Optional[str]) -> List[str]:
+    """Parse a comma separated field list (``None`` means every field)."""
+    available = EXPORT_FIELDS[kind]
+    if not fields:
+        return list(available)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in available]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "unknown_export_fields", "fields": unknown, "available": list(available)},
+        )
+    return requested
+
+
+def _iter_content_piece_windows(
+    session: Session,
+    course_id: int,
+    window_size: int,
+    columns: Sequence[Any],
+) -> Iterator[List[Any]]:
+    last_id: Optional[int] = None
+    while True:
+        statement = select(*columns, ContentPiece.id.label("key_id")).where(ContentPiece.course_id == course_id)
+        if last_id is not None:
+            statement = statement.where(ContentPiece.id > last_id)
+        rows = session.exec(statement.order_by(ContentPiece.id).limit(window_size)).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < window_size:
+            return
+        last_id = rows[-1].key_id
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):  # str Enum
+        return value.value
+    return value
+
+
+def iter_course_export(course_id: int, kind: str, fields: List[str], compress: bool = False) -> Iterator[bytes]:
+    """Yield NDJSON (optionally gzip) bytes for a course, one keyset window at a time.
+
+    使用独立 session：StreamingResponse 在路由依赖退出后才开始迭代。每个窗口是一次
+    独立的 LIMIT 查询，不持有长事务，内存占用与课程大小无关。
+    """
+    start = perf_counter()
+    columns = [EXPORT_FIELDS[kind][name].label(name) for name in fields]
+    compressor = zlib.compressobj(level=6, wbits=zlib.MAX_WBITS | 16) if compress else None
+    exported = 0
+    with session_context() as session:
+        if kind == "chunks":
+            windows = iter_course_chunk_windows(session, course_id, EXPORT_WINDOW_SIZE, columns=columns)
+        else:
+            windows = _iter_content_piece_windows(session, course_id, EXPORT_WINDOW_SIZE, columns)
+        for rows in windows:
+            lines = "".join(
+                json.dumps({name: _jsonable(row._mapping[name]) for name in fields}, ensure_ascii=False) + "\n"
+                for row in rows
+            ).encode("utf-8")
+            exported += len(rows)
+            if compressor is None:
+                yield lines
+            else:
+                chunk = compressor.compress(lines)
+                if chunk:
+                    yield chunk
+    if compressor is not None:
+        yield compressor.flush()
+    logger.info(
+        "Exported %s %s of course %s (gzip=%s) in %.2f ms",
+        exported,
+        kind,
+        course_id,
+        compress,
+        (perf_counter() - start) * 1000,
+    )
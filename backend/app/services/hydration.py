@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from sqlmodel import Session, select
+
+from ..config import get_settings
+from ..models import Chunk
+from .search_cache import ByteLRUCache
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ChunkRecord = Tuple[str, Dict[str, object]]
+
+
+def _record_size(value: ChunkRecord) -> int:
+    return len(value[0]) * 3 + 256
+
+
+# 热点 chunk 文本缓存，键为 (course_id, chunk_id)；重新 assembly 时按课程整体失效
+chunk_text_cache = ByteLRUCache(settings.chunk_text_cache_bytes, _record_size)
+
+
+def fetch_chunk_records(session: Session, course_id: int, chunk_ids: Iterable[int]) -> Dict[int, ChunkRecord]:
+    """Return ``{chunk_id: (text, metadata)}``, reading cache misses with a single ``IN`` query."""
+    records: Dict[int, ChunkRecord] = {}
+    missing: List[int] = []
+    for chunk_id in dict.fromkeys(chunk_ids):
+        cached = chunk_text_cache.get((course_id, chunk_id)) if chunk_text_cache.max_bytes else None
+        if cached is not None:
+            records[chunk_id] = cached
+        else:
+            missing.append(chunk_id)
+    if not missing:
+        return records
+
+    rows = session.exec(
+        select(Chunk.id, Chunk.text, Chunk.lecture_id, Chunk.section_id, Chunk.source_type).where(
+            Chunk.course_id == course_id, Chunk.id.in_(missing)
+        )
+    ).all()
+    for row in rows:
+        metadata = {
+            "course_id": course_id,
+            "lecture_id": row.lecture_id,
+            "section_id": row.section_id,
+            "source_type": row.source_type,
+        }
+        record = (row.text, {k: v for k, v in metadata.items() if v is not None})
+        records[row.id] = record
+        if chunk_text_cache.max_bytes:
+            chunk_text_cache.put((course_id, row.id), record)
+    return records
+
+
+def hydrate_many(
+    session: Session,
+    course_id: int,
+    result_lists: Sequence[Sequence[Dict[str, object]]],
+) -> List[List[Dict[str, object]]]:
+    """Fill ``text``/metadata for hits whose vector store entry carries no document.
+
+    All lists are hydrated with one lookup. Hits that already have text are
+    returned untouched; hits whose chunk no longer exists (course re-assembled
+    after embedding) are dropped.
+    """
+    pending = [int(item["chunk_id"]) for results in result_lists for item in results if not item.get("text")]
+    if not pending:
+        return [list(results) for results in result_lists]
+    records = fetch_chunk_records(session, course_id, pending)
+    hydrated_lists: List[List[Dict[str, object]]] = []
+    for results in result_lists:
+        hydrated: List[Dict[str, object]] = []
+        for item in results:
+            if item.get("text"):
+                hydrated.append(item)
+                continue
+            record = records.get(int(item["chunk_id"]))
+            if record is None:
+                logger.warning("Dropping search hit for missing chunk %s in course %s", item["chunk_id"], course_id)
+                continue
+            text, metadata = record
+            hydrated.append({**item, "text": text, "metadata": {**(item.get("metadata") or {}), **metadata}})
+        hydrated_lists.append(hydrated)
+    return hydrated_lists
+
+
+def hydrate_results(session: Session, course_id: int, results: Sequence[Dict[str, object]]) -> List[Dict[str, object]]:
+    return hydrate_many(session, course_id, [results])[0]
+
+
+def invalidate_course(course_id: int) -> int:
+    return chunk_text_cache.discard_where(lambda key: key[0] == course_id)
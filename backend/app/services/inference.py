@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import logging
+import math
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, TypeVar
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+# 服务时间的指数滑动平均系数，用于估算 Retry-After
+SERVICE_TIME_EWMA_ALPHA = 0.2
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when the executor already holds ``max_workers + max_queue`` tasks."""
+
+    def __init__(self, name: str, retry_after: int) -> None:
+        super().__init__(f"{name} executor saturated")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """Thread pool with a hard cap on queued work (admission control).
+
+    ``ThreadPoolExecutor`` queues without limit, so under a spike every
+    request waits behind all others. Here at most ``max_workers`` tasks run
+    and ``max_queue`` wait; further submissions are rejected immediately with
+    a retry hint derived from the observed service time.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = Lock()
+        self._inflight = 0
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+        self._service_ms = 0.0
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, assuming the current queue drains at the average rate."""
+        with self._lock:
+            queued = max(self._inflight - self._running, 0)
+            service_s = (self._service_ms or 100.0) / 1000
+        return max(1, math.ceil((queued + 1) / self.max_workers * service_s))
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> "Future[T]":
+        with self._lock:
+            admitted = self._inflight < self.max_workers + self.max_queue
+            if admitted:
+                self._inflight += 1
+            else:
+                self._rejected += 1
+        if not admitted:
+            raise ExecutorSaturated(self.name, self.retry_after())
+
+        def run() -> T:
+            start = perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed_ms = (perf_counter() - start) * 1000
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._service_ms = (
+                        elapsed_ms
+                        if not self._service_ms
+                        else (1 - SERVICE_TIME_EWMA_ALPHA) * self._service_ms + SERVICE_TIME_EWMA_ALPHA * elapsed_ms
+                    )
+
+        future = self._executor.submit(run)
+        # 无论正常完成、异常还是排队中被取消，都释放名额
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._inflight -= 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": max(self._inflight - self._running, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_service_ms": round(self._service_ms, 2),
+            }
+
+
+# 模型推理（/embed 与检索的查询向量化）共用一个有界执行器，避免并发前向互相抢占 CPU/GPU
+inference_executor = BoundedExecutor(
+    "inference",
+    max_workers=settings.inference_max_concurrency,
+    max_queue=settings.inference_queue_size,
+)
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import re
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlmodel import Session
+
+from ..config import get_settings
+from ..database import session_context
+from . import search_cache
+from .assembly import iter_course_chunk_windows
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+INDEX_WINDOW_SIZE = 2000
+# 索引文件格式版本；读到旧版本时照常使用，同时在后台重建
+# 2: 中文片段额外索引单字，单字查询也能命中
+INDEX_FORMAT = 2
+
+# 中文（含日文假名/韩文）连续片段切成字二元组（建索引时另加单字）；拉丁字母、数字、代码标识符按整词切分
+_CJK_RUN = r"[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]+"
+_WORD = r"[A-Za-z0-9_]+(?:[.\-][A-Za-z0-9_]+)*"
+_TOKEN_PATTERN = re.compile(f"({_CJK_RUN})|({_WORD})")
+
+
+def tokenize(text: str, unigrams: bool = False) -> List[str]:
+    """Character bigrams for CJK runs, lowercased tokens for Latin words and code identifiers.
+
+    ``unigrams=True`` (index side) also emits every CJK character, so a one-character
+    query, which tokenizes to a single unigram, can match inside longer runs.
+    """
+    tokens: List[str] = []
+    for cjk, word in _TOKEN_PATTERN.findall(text or ""):
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i : i + 2] for i in range(len(cjk) - 1))
+                if unigrams:
+                    tokens.extend(cjk)
+        else:
+            lowered = word.lower()
+            tokens.append(lowered)
+            # 点号/连字符连接的标识符同时索引各部分，便于只输入其中一段的查询
+            if "." in lowered or "-" in lowered:
+                tokens.extend(part for part in re.split(r"[.\-]", lowered) if part)
+    return tokens
+
+
+@dataclass
+class LexicalIndex:
+    """BM25 inverted index in CSR form: postings for term ``t`` live in ``[offsets[t], offsets[t+1])``."""
+
+    stamp: int
+    format: int
+    term_ids: Dict[str, int]
+    offsets: np.ndarray
+    doc_index: np.ndarray
+    term_freqs: np.ndarray
+    chunk_ids: np.ndarray
+    doc_lens: np.ndarray
+    lecture_ids: np.ndarray
+    section_ids: np.ndarray
+    source_types: np.ndarray
+    source_type_vocab: List[str]
+
+    @property
+    def size(self) -> int:
+        return int(self.chunk_ids.shape[0])
+
+
+_cache: Dict[int, LexicalIndex] = {}
+_cache_lock = Lock()
+
+
+def _index_path(course_id: int) -> Path:
+    return settings.lexical_index_dir / f"course_{course_id}.npz"
+
+
+def build_course_index(session: Session, course_id: int) -> int:
+    """(Re)build and persist the inverted index for a course; return the number of chunks indexed."""
+    term_ids: Dict[str, int] = {}
+    postings: List[List[Tuple[int, int]]] = []
+    chunk_ids: List[int] = []
+    doc_lens: List[int] = []
+    lecture_ids: List[int] = []
+    section_ids: List[int] = []
+    source_types: List[int] = []
+    source_type_vocab: List[str] = []
+
+    for window in iter_course_chunk_windows(session, course_id, INDEX_WINDOW_SIZE):
+        for row in window:
+            doc = len(chunk_ids)
+            counts = Counter(tokenize(row.text, unigrams=True))
+            for term, tf in counts.items():
+                term_id = term_ids.setdefault(term, len(term_ids))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((doc, tf))
+            chunk_ids.append(row.id)
+            doc_lens.append(sum(counts.values()))
+            lecture_ids.append(row.lecture_id)
+            section_ids.append(row.section_id)
+            if row.source_type not in source_type_vocab:
+                source_type_vocab.append(row.source_type)
+            source_types.append(source_type_vocab.index(row.source_type))
+
+    offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+    if postings:
+        np.cumsum([len(items) for items in postings], out=offsets[1:])
+    flat = [pair for items in postings for pair in items]
+    terms = sorted(term_ids, key=term_ids.get)
+
+    arrays = {
+        "format": np.asarray(INDEX_FORMAT, dtype=np.int32),
+        "terms": np.asarray(terms, dtype=str),
+        "offsets": offsets,
+        "doc_index": np.asarray([doc for doc, _ in flat], dtype=np.int32),
+        "term_freqs": np.asarray([tf for _, tf in flat], dtype=np.int32),
+        "chunk_ids": np.asarray(chunk_ids, dtype=np.int64),
+        "doc_lens": np.asarray(doc_lens, dtype=np.int32),
+        "lecture_ids": np.asarray(lecture_ids, dtype=np.int64),
+        "section_ids": np.asarray(section_ids, dtype=np.int64),
+        "source_types": np.asarray(source_types, dtype=np.int32),
+        "source_type_vocab": np.asarray(source_type_vocab, dtype=str),
+    }
+    path = _index_path(course_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 每次构建写独立的临时文件：检索触发的后台构建与 assembly 末尾的构建可能同时进行
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp.npz", delete=False) as tmp:
+        tmp_path = Path(tmp.name)
+    try:
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    with _cache_lock:
+        _cache.pop(course_id, None)
+    search_cache.invalidate_course(course_id)
+    logger.info("Built lexical index for course %s: %s chunks, %s terms", course_id, len(chunk_ids), len(terms))
+    return len(chunk_ids)
+
+
+# 老课程没有索引文件时在后台补建（整门课扫描，不能放进检索请求的时间预算里）
+_build_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lexical-build")
+_building: Set[int] = set()
+
+
+def _build_in_background(course_id: int) -> None:
+    try:
+        with session_context() as session:
+            build_course_index(session, course_id)
+    except Exception as exc:  # pragma: no cover - 下次检索未命中时会重新调度
+        logger.exception("Background lexical index build for course %s failed: %s", course_id, exc)
+    finally:
+        with _cache_lock:
+            _building.discard(course_id)
+
+
+def schedule_build(course_id: int) -> bool:
+    """Queue a background build unless one is already pending; return True if queued."""
+    with _cache_lock:
+        if course_id in _building:
+            return False
+        _building.add(course_id)
+    _build_executor.submit(_build_in_background, course_id)
+    logger.info("Scheduled background lexical index build for course %s", course_id)
+    return True
+
+
+def load_course_index(course_id: int) -> Optional[LexicalIndex]:
+    """Return the cached index, reloading when the file changed.
+
+    Returns ``None`` while the index does not exist yet; a background build is
+    scheduled on the first miss and callers treat the lexical stage as unavailable.
+    """
+    path = _index_path(course_id)
+    if not path.exists():
+        schedule_build(course_id)
+        return None
+    try:
+        stamp = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(course_id)
+    if cached is not None and cached.stamp == stamp:
+        return cached
+
+    with np.load(path, allow_pickle=False) as data:
+        terms = data["terms"].tolist()
+        index = LexicalIndex(
+            stamp=stamp,
+            format=int(data["format"]) if "format" in data.files else 1,
+            term_ids={term: idx for idx, term in enumerate(terms)},
+            offsets=data["offsets"],
+            doc_index=data["doc_index"],
+            term_freqs=data["term_freqs"],
+            chunk_ids=data["chunk_ids"],
+            doc_lens=data["doc_lens"],
+            lecture_ids=data["lecture_ids"],
+            section_ids=data["section_ids"],
+            source_types=data["source_types"],
+            source_type_vocab=data["source_type_vocab"].tolist(),
+        )
+    with _cache_lock:
+        _cache[course_id] = index
+    if index.format < INDEX_FORMAT:
+        schedule_build(course_id)
+    return index
+
+
+def _filter_mask(index: LexicalIndex, filters: Dict[str, int | str]) -> Optional[np.ndarray]:
+    mask: Optional[np.ndarray] = None
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key == "lecture_id":
+            condition = index.lecture_ids == int(value)
+        elif key == "section_id":
+            condition = index.section_ids == int(value)
+        elif key == "source_type":
+            if value not in index.source_type_vocab:
+                return np.zeros(index.size, dtype=bool)
+            condition = index.source_types == index.source_type_vocab.index(value)
+        else:
+            continue
+        mask = condition if mask is None else (mask & condition)
+    return mask
+
+
+def bm25_search(
+    index: LexicalIndex,
+    query: str,
+    top_k: int,
+    filters: Optional[Dict[str, int | str]] = None,
+) -> List[Tuple[int, float]]:
+    """Return ``(chunk_id, bm25_score)`` pairs, best first."""
+    if index.size == 0:
+        return []
+    scores = np.zeros(index.size, dtype=np.float32)
+    avgdl = float(index.doc_lens.mean()) or 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * index.doc_lens / avgdl)
+    matched = False
+    for term, query_tf in Counter(tokenize(query)).items():
+        term_id = index.term_ids.get(term)
+        if term_id is None:
+            continue
+        matched = True
+        start, end = int(index.offsets[term_id]), int(index.offsets[term_id + 1])
+        docs = index.doc_index[start:end]
+        tf = index.term_freqs[start:end].astype(np.float32)
+        idf = math.log(1 + (index.size - docs.shape[0] + 0.5) / (docs.shape[0] + 0.5))
+        scores[docs] += query_tf * idf * tf * (BM25_K1 + 1) / (tf + norm[docs])
+    if not matched:
+        return []
+
+    mask = _filter_mask(index, filters or {})
+    if mask is not None:
+        scores[~mask] = 0.0
+    candidates = np.flatnonzero(scores > 0)
+    if candidates.shape[0] > top_k:
+        candidates = candidates[np.argpartition(scores[candidates], -top_k)[-top_k:]]
+    candidates = candidates[np.argsort(-scores[candidates])]
+    return [(int(index.chunk_ids[doc]), float(scores[doc])) for doc in candidates]
+
+
+def to_results(hits: Sequence[Tuple[int, float]]) -> List[Dict[str, object]]:
+    """Wrap BM25 hits as search results; text/metadata are filled by ``hydration``."""
+    return [{"chunk_id": chunk_id, "text": None, "metadata": {}, "score": score} for chunk_id, score in hits]
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Dict[str, object]]], top_k: int) -> List[Dict[str, object]]:
+    """Fuse ranked result lists with RRF; ``score`` becomes the fused RRF score."""
+    fused: Dict[int, float] = {}
+    first_seen: Dict[int, Dict[str, object]] = {}
+    for results in result_lists:
+        for rank, item in enumerate(results, start=1):
+            chunk_id = int(item["chunk_id"])
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+            first_seen.setdefault(chunk_id, item)
+    ranked = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    return [{**first_seen[chunk_id], "score": round(fused[chunk_id], 6)} for chunk_id in ranked]
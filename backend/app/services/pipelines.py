@@ -13,11 +13,22 @@ from ..models import (
     Resource,
     ResourceType,
 )
-from . import documents, storage, transcription
+from . import bulk, documents, events, status_writer, storage, transcription
 
 logger = logging.getLogger(__name__)
 
 
+def _set_stage(resource: Resource, stage: ProcessingStage) -> None:
+    # 负载按新阶段预先算好，写线程提交成功后再推送
+    course_id = resource.course_id
+    payload = {**events.resource_payload(resource), "processing_stage": stage.value}
+    status_writer.apply(
+        resource,
+        on_commit=lambda: events.publish_course(course_id, "resource", payload),
+        processing_stage=stage,
+    )
+
+
 def _clear_existing_content(session: Session, resource_id: int) -> None:
     session.exec(delete(ContentPiece).where(ContentPiece.resource_id == resource_id))
     session.commit()
@@ -32,27 +43,24 @@ def process_video_resource(session: Session, resource: Resource) -> None:
     _clear_existing_content(session, resource.id)
 
     with StageTimer(resource.id, "downloading", "Download audio"):
-        resource.processing_stage = ProcessingStage.downloading
-        session.commit()
+        _set_stage(resource, ProcessingStage.downloading)
         audio_source = storage.download_audio_from_url(resource.id, resource.source_url)
         resource.meta["download_path"] = str(audio_source)
         session.commit()
 
     with StageTimer(resource.id, "audio_extracting", "Convert to wav"):
-        resource.processing_stage = ProcessingStage.audio_extracting
-        session.commit()
+        _set_stage(resource, ProcessingStage.audio_extracting)
         wav_path = storage.convert_to_wav(resource.id, audio_source)
         resource.meta["audio_path"] = str(wav_path)
         session.commit()
 
     with StageTimer(resource.id, "asr", "Run ASR"):
-        resource.processing_stage = ProcessingStage.asr
-        session.commit()
+        _set_stage(resource, ProcessingStage.asr)
         segments = list(transcription.transcribe_audio(str(wav_path)))
 
     with StageTimer(resource.id, "contentpiece_build", "Persist transcript segments"):
-        resource.processing_stage = ProcessingStage.contentpiece_build
-        session.commit()
+        _set_stage(resource, ProcessingStage.contentpiece_build)
+        pieces = []
         for idx, (start_time, end_time, text) in enumerate(segments):
             clean_text = text.strip()
             if not clean_text:
@@ -69,7 +77,8 @@ def process_video_resource(session: Session, resource: Resource) -> None:
                 order_in_resource=idx,
                 metadata={"duration": end_time - start_time},
             )
-            session.add(piece)
+            pieces.append(piece)
+        bulk.insert_many(session, ContentPiece, pieces)
         session.commit()
 
 
@@ -78,8 +87,7 @@ def process_document_resource(session: Session, resource: Resource) -> None:
     logger.info("Processing document resource %s", resource.id)
     _clear_existing_content(session, resource.id)
 
-    resource.processing_stage = ProcessingStage.doc_parsing
-    session.commit()
+    _set_stage(resource, ProcessingStage.doc_parsing)
 
     local_path_str = resource.meta.get("local_path") or resource.source_url
     if not local_path_str:
@@ -101,9 +109,9 @@ def process_document_resource(session: Session, resource: Resource) -> None:
         iterator = documents.parse_text_file(local_path)
         source_type = ContentSourceType.text
 
-    resource.processing_stage = ProcessingStage.contentpiece_build
-    session.commit()
+    _set_stage(resource, ProcessingStage.contentpiece_build)
 
+    pieces = []
     for order, (page_number, text) in enumerate(iterator):
         piece = ContentPiece(
             course_id=resource.course_id,
@@ -115,5 +123,6 @@ def process_document_resource(session: Session, resource: Resource) -> None:
             page_number=page_number,
             order_in_resource=order,
         )
-        session.add(piece)
+        pieces.append(piece)
+    bulk.insert_many(session, ContentPiece, pieces)
     session.commit()
@@ -6,7 +6,9 @@ from dataclasses import dataclass
 from enum import Enum
 from queue import Empty, Queue
 from threading import Event, Thread
-from typing import Optional
+from typing import Optional, Sequence
+
+from sqlmodel import select
 
 from ..config import get_settings
 from ..database import session_context
@@ -18,7 +20,7 @@ from ..models import (
     ResourceStatus,
     ResourceType,
 )
-from . import assembly, pipelines, validation
+from . import assembly, events, pipelines, status_writer, validation
 from .embedding_pipeline import run_course_embedding
 
 logger = logging.getLogger(__name__)
@@ -57,9 +59,36 @@ class ResourceProcessor:
             resource.updated_at = datetime.utcnow()
             session.add(resource)
             session.commit()
+            events.publish_resource(resource)
 
         self.queue.put(WorkerTask(type=TaskType.process_resource, resource_id=resource_id))
 
+    def enqueue_resources(self, resource_ids: Sequence[int]) -> None:
+        """Mark a batch of resources as queued in one commit, then queue them in order."""
+        if not resource_ids:
+            return
+        with session_context() as session:
+            resources = session.exec(
+                select(Resource).where(Resource.id.in_(resource_ids)).order_by(Resource.id)
+            ).all()
+            now = datetime.utcnow()
+            for resource in resources:
+                resource.status = ResourceStatus.queued
+                resource.processing_stage = ProcessingStage.waiting
+                resource.updated_at = now
+                session.add(resource)
+            # 提交前取好 id 与事件内容，避免提交后逐条过期刷新
+            found = [resource.id for resource in resources]
+            published = [(resource.course_id, events.resource_payload(resource)) for resource in resources]
+            session.commit()
+        for course_id, payload in published:
+            events.publish_course(course_id, "resource", payload)
+        missing = set(resource_ids) - set(found)
+        if missing:
+            logger.warning("Resources %s not found when enqueuing batch", sorted(missing))
+        for resource_id in found:
+            self.queue.put(WorkerTask(type=TaskType.process_resource, resource_id=resource_id))
+
     def enqueue_course_embedding(self, course_id: int) -> None:
         """Queue a course-level embedding任务."""
         with session_context() as session:
@@ -75,6 +104,7 @@ class ResourceProcessor:
             course.embedding_error = None
             session.add(course)
             session.commit()
+            events.publish_embedding(course)
         self.queue.put(WorkerTask(type=TaskType.embed_course, course_id=course_id))
 
     def _worker_loop(self) -> None:
@@ -120,12 +150,15 @@ class ResourceProcessor:
                 resource.updated_at = datetime.utcnow()
                 session.add(resource)
                 session.commit()
+                events.publish_resource(resource)
 
                 if resource.resource_type == ResourceType.video:
                     pipelines.process_video_resource(session, resource)
                 else:
                     pipelines.process_document_resource(session, resource)
 
+                if not status_writer.flush():
+                    logger.warning("Some stage updates for resource %s were not persisted", resource_id)
                 resource.status = ResourceStatus.succeeded
                 resource.processing_stage = ProcessingStage.sectioning
                 resource.retry_count = 0
@@ -133,9 +166,11 @@ class ResourceProcessor:
                 resource.updated_at = datetime.utcnow()
                 session.add(resource)
                 session.commit()
+                events.publish_resource(resource)
 
                 assembled = assembly.assemble_course_if_ready(session, resource.course_id)
                 if assembled:
+                    events.publish_course(resource.course_id, "assembled")
                     valid, issues = validation.validate_course_chunks(session, resource.course_id)
                     if not valid:
                         raise ValueError(
@@ -144,18 +179,23 @@ class ResourceProcessor:
                 resource.processing_stage = ProcessingStage.done
                 session.add(resource)
                 session.commit()
+                events.publish_resource(resource)
             except Exception as exc:  # pragma: no cover - debug logging
                 logger.exception("Resource %s failed: %s", resource_id, exc)
+                if not status_writer.flush():
+                    logger.warning("Some stage updates for resource %s were not persisted", resource_id)
                 resource.status = ResourceStatus.failed
                 resource.error_message = str(exc)
                 resource.retry_count += 1
                 resource.updated_at = datetime.utcnow()
                 session.add(resource)
                 session.commit()
+                events.publish_resource(resource)
 
     def shutdown(self) -> None:
         self.stop_event.set()
         self.worker.join(timeout=1)
+        status_writer.status_writer.shutdown()
 
 
 processor = ResourceProcessor()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+def mmr_rerank(
+    query_vector: Sequence[float],
+    candidates: List[Dict[str, object]],
+    top_k: int,
+    lambda_mult: float = 0.5,
+) -> List[Dict[str, object]]:
+    """Maximal Marginal Relevance over candidates carrying an ``embedding``.
+
+    相关度与候选间相似度各做一次矩阵乘法；贪心选择时只维护每个候选到已选集合的
+    最大相似度向量，每步 O(n) 更新，不再逐对计算。返回结果保留原始相似度分数。
+    """
+    usable = [item for item in candidates if item.get("embedding") is not None]
+    if len(usable) <= 1 or top_k <= 0:
+        return usable[:top_k]
+
+    matrix = np.stack([np.asarray(item["embedding"], dtype=np.float32) for item in usable])
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.maximum(norms, 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = matrix @ query
+    similarity = matrix @ matrix.T
+    limit = min(top_k, len(usable))
+    selected: List[int] = []
+    max_similarity = np.full(len(usable), -np.inf, dtype=np.float32)
+    available = np.ones(len(usable), dtype=bool)
+    for _ in range(limit):
+        if selected:
+            objective = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        else:
+            objective = relevance.copy()
+        objective[~available] = -np.inf
+        choice = int(np.argmax(objective))
+        selected.append(choice)
+        available[choice] = False
+        np.maximum(max_similarity, similarity[choice], out=max_similarity)
+    return [usable[idx] for idx in selected]
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
 
 from fastapi import HTTPException, status
 from sqlmodel import Session, select
 
 from .. import schemas
+from ..config import get_settings
 from ..models import (
     Course,
     Lecture,
@@ -85,6 +87,96 @@ def create_resource(session: Session, payload: schemas.ResourceCreate) -> Resour
     return resource
 
 
+UPLOAD_SUFFIX_TYPES = {
+    ".pdf": ResourceType.pdf,
+    ".ppt": ResourceType.ppt,
+    ".pptx": ResourceType.ppt,
+    ".md": ResourceType.markdown,
+    ".markdown": ResourceType.markdown,
+    ".txt": ResourceType.text,
+}
+
+
+def infer_upload_type(filename: Optional[str]) -> ResourceType:
+    resource_type = UPLOAD_SUFFIX_TYPES.get(Path(filename or "").suffix.lower())
+    if resource_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "unsupported_upload_type", "filename": filename},
+        )
+    return resource_type
+
+
+def create_resources(
+    session: Session,
+    course_id: int,
+    items: Sequence[schemas.ResourceBatchItem],
+    before_commit: Optional[Callable[[List[Resource]], None]] = None,
+) -> List[Resource]:
+    """Create many resources (and their lectures) in one transaction.
+
+    讲次绑定规则与 :func:`create_resource` 一致：视频各自新建讲次，文档挂到当前最后一个
+    讲次（包括本批次中刚创建的）。讲次序号只查询一次，后续在内存中递增。
+    ``before_commit`` 在 flush 拿到 id 之后、提交之前调用（例如落盘上传文件），
+    它抛出的异常会回滚整个批次。
+    """
+    limit = get_settings().resource_batch_max_items
+    if len(items) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "batch_too_large", "limit": limit},
+        )
+    course = session.get(Course, course_id)
+    if not course:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    if any(item.resource_type == ResourceType.video and not item.source_url for item in items):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"code": "video_requires_url"})
+
+    latest = session.exec(
+        select(Lecture).where(Lecture.course_id == course_id).order_by(Lecture.order_index.desc())
+    ).first()
+    next_order = (latest.order_index if latest else 0) + 1
+
+    def new_lecture(title: str) -> Lecture:
+        nonlocal latest, next_order
+        latest = Lecture(course_id=course_id, title=title, order_index=next_order)
+        next_order += 1
+        session.add(latest)
+        return latest
+
+    resources: List[Resource] = []
+    for item in items:
+        if item.resource_type == ResourceType.video:
+            lecture = new_lecture(item.display_name or f"Lecture {next_order}")
+        else:
+            lecture = latest or new_lecture("Lecture 1 (Auto)")
+        resource = Resource(
+            course_id=course.id,
+            resource_type=item.resource_type,
+            display_name=item.display_name,
+            source_url=item.source_url,
+            original_filename=item.original_filename,
+            status=ResourceStatus.pending,
+            processing_stage=ProcessingStage.waiting,
+        )
+        resource.lecture = lecture
+        session.add(resource)
+        resources.append(resource)
+
+    try:
+        session.flush()
+        if before_commit is not None:
+            before_commit(resources)
+        course.updated_at = datetime.utcnow()
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    for resource in resources:
+        session.refresh(resource)
+    return resources
+
+
 def retry_resource(session: Session, resource_id: int) -> Resource:
     resource = session.get(Resource, resource_id)
     if not resource:
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import logging
+import unicodedata
+from array import array
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from ..config import get_settings
+from ..models import Course
+from .embedding import embed_texts, embedding_version
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ByteLRUCache:
+    """Thread-safe LRU cache bounded by an estimated byte size rather than entry count."""
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int]) -> None:
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)[1]
+            return len(stale)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _vector_size(value: array) -> int:
+    return value.itemsize * len(value) + 96
+
+
+def _results_size(value: List[Dict[str, object]]) -> int:
+    # 粗略估计：中文文本按 UTF-8 每字 3 字节，外加字典/元数据开销
+    return sum(len(str(item.get("text") or "")) * 3 + 256 for item in value) + 64
+
+
+query_embedding_cache = ByteLRUCache(settings.search_embedding_cache_bytes, _vector_size)
+search_result_cache = ByteLRUCache(settings.search_result_cache_bytes, _results_size)
+
+
+def normalize_query(query: str) -> str:
+    """NFKC-fold and collapse whitespace so trivially different queries share a key.
+
+    不做大小写折叠：大小写会改变模型输出（缩写、代码标识符），键与模型输入必须一致。
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).split())
+
+
+def embed_queries(queries: Sequence[str]) -> List[List[float]]:
+    """Embed queries, reusing cached vectors and running the model once for all misses.
+
+    模型输入就是缓存键里的归一化文本（全角/半角、多余空白折叠后），因此缓存命中与否
+    不会改变查询得到的向量；结果缓存同样按该文本键控。
+    """
+    version = embedding_version()
+    keys = [(version, normalize_query(query)) for query in queries]
+    vectors: List[Optional[List[float]]] = [None] * len(queries)
+    missing: Dict[Tuple[str, str], List[int]] = {}
+    for position, key in enumerate(keys):
+        cached = query_embedding_cache.get(key) if query_embedding_cache.max_bytes else None
+        if cached is not None:
+            vectors[position] = cached.tolist()
+        else:
+            missing.setdefault(key, []).append(position)
+
+    if missing:
+        texts = [normalized for _, normalized in missing]
+        for (key, positions), vector in zip(missing.items(), embed_texts(texts)):
+            if query_embedding_cache.max_bytes:
+                query_embedding_cache.put(key, array("f", vector))
+            for position in positions:
+                vectors[position] = vector
+    return [vector for vector in vectors if vector is not None]
+
+
+def course_cache_version(course: Course) -> str:
+    """Stamp that changes whenever the course's embedding job finishes (``updated_at`` bumps)."""
+    version = (course.meta or {}).get("embedding_version", "")
+    return f"{version}@{course.updated_at.isoformat()}"
+
+
+def result_cache_key(
+    course_id: int,
+    course_version: str,
+    query: str,
+    top_k: int,
+    filters: Optional[Dict[str, int | str]],
+    options: Tuple[Hashable, ...] = (),
+) -> Tuple[Hashable, ...]:
+    """Key search results by course, its embedding version stamp, query, top_k, filters and ranking options."""
+    return (
+        course_id,
+        course_version,
+        normalize_query(query),
+        top_k,
+        tuple(sorted((filters or {}).items())),
+        options,
+    )
+
+
+def get_cached_results(key: Tuple[Hashable, ...]) -> Optional[List[Dict[str, object]]]:
+    if not search_result_cache.max_bytes:
+        return None
+    return search_result_cache.get(key)
+
+
+def cache_results(key: Tuple[Hashable, ...], results: List[Dict[str, object]]) -> None:
+    if search_result_cache.max_bytes:
+        search_result_cache.put(key, results)
+
+
+def invalidate_course(course_id: int) -> int:
+    """Drop cached results for a course (called when its embedding job completes)."""
+    removed = search_result_cache.discard_where(lambda key: key[0] == course_id)
+    if removed:
+        logger.info("Invalidated %s cached search results for course %s", removed, course_id)
+    return removed
+
+
+def cache_stats() -> Dict[str, Dict[str, float]]:
+    return {
+        "query_embeddings": query_embedding_cache.stats(),
+        "search_results": search_result_cache.stats(),
+    }
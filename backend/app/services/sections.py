@@ -2,7 +2,8 @@ from fastapi import HTTPException, status
 from sqlmodel import Session
 
 from .. import schemas
-from ..models import Section
+from ..models import Course, Section
+from .assembly import bump_outline_version
 
 
 def update_section(session: Session, section_id: int, payload: schemas.SectionUpdate) -> Section:
@@ -15,6 +16,10 @@ def update_section(session: Session, section_id: int, payload: schemas.SectionUp
     if payload.summary is not None:
         section.summary = payload.summary
     session.add(section)
+    course = session.get(Course, section.course_id)
+    if course:
+        bump_outline_version(course)
+        session.add(course)
     session.commit()
     session.refresh(section)
     return section
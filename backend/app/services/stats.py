@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from ..models import Chunk, Course, Resource, Section
+from .vectorstore import VectorStoreError, count_course_collection
+
+logger = logging.getLogger(__name__)
+
+
+def _count_by_course(model) -> Any:
+    return (
+        select(model.course_id.label("course_id"), func.count(model.id).label("total"))
+        .group_by(model.course_id)
+        .subquery()
+    )
+
+
+def course_overview(session: Session) -> List[Dict[str, Any]]:
+    """Per-course resource/section/chunk counts in one grouped query; vector counts come from course meta.
+
+    向量条数在 embedding 完成（或快照导入、重建）时写入 ``course.meta["vector_count"]``，
+    列表页不再逐课程打开向量库；更早 embedding 的课程在首次读取时补算一次并写回。
+    """
+    resources = _count_by_course(Resource)
+    sections = _count_by_course(Section)
+    chunks = _count_by_course(Chunk)
+    rows = session.exec(
+        select(
+            Course,
+            func.coalesce(resources.c.total, 0),
+            func.coalesce(sections.c.total, 0),
+            func.coalesce(chunks.c.total, 0),
+        )
+        .outerjoin(resources, resources.c.course_id == Course.id)
+        .outerjoin(sections, sections.c.course_id == Course.id)
+        .outerjoin(chunks, chunks.c.course_id == Course.id)
+        .order_by(Course.created_at.desc())
+    ).all()
+    backfilled = [
+        course
+        for course, *_ in rows
+        if (course.meta or {}).get("vector_count") is None and refresh_vector_count(course) is not None
+    ]
+    if backfilled:
+        for course in backfilled:
+            session.add(course)
+        session.commit()
+    return [
+        {
+            "course": course,
+            "resource_count": resource_count,
+            "section_count": section_count,
+            "chunk_count": chunk_count,
+            "vector_count": (course.meta or {}).get("vector_count"),
+        }
+        for course, resource_count, section_count, chunk_count in rows
+    ]
+
+
+def refresh_vector_count(course: Course) -> Optional[int]:
+    """Store the live vector count in ``course.meta``; caller commits."""
+    try:
+        count = count_course_collection(course.id)
+    except VectorStoreError as exc:
+        logger.warning("Failed to refresh vector count for course %s: %s", course.id, exc)
+        return None
+    course.meta = {**(course.meta or {}), "vector_count": count}
+    return count
@@ -0,0 +1,209 @@
+"""Serialized writer for high-frequency worker status updates.
+
+阶段切换、embedding 进度这类只改几列的状态更新不再各自在 worker 的 session 里提交，
+而是交给单个写线程：同一行的连续更新在短窗口内合并，每个窗口一个事务批量写入，
+SQLite 写锁的持有次数与时长都随之下降，API 读请求不再被频繁的小事务卡住。
+
+worker 侧用 ``set_committed_value`` 同步内存对象，既能立即读到新值，又不会在自己
+下一次提交时重复写这些列。worker 之后要直接提交同一行时先调用 :func:`flush`，
+保证旧的排队更新不会覆盖新值。
+
+提交失败的批次合并回队列、退避后重试（同一行更新的值以较新的为准），连续失败
+``status_writer_max_attempts`` 次才丢弃并记错误日志，此时 :func:`flush` 返回 False。
+
+``apply(..., on_commit=...)`` 的回调在该批事务提交成功后由写线程执行（例如推送 SSE
+事件），客户端收到通知时数据库里一定已是新值；提交失败则不执行。
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from threading import Condition, Thread
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Session, SQLModel
+
+from ..config import get_settings
+from ..database import engine
+
+logger = logging.getLogger(__name__)
+
+_Key = Tuple[Type[SQLModel], int]
+
+
+class StatusWriter:
+    """Single background writer; the thread starts on the first submitted update, not at import."""
+
+    def __init__(self, coalesce_ms: int, max_attempts: int) -> None:
+        self.coalesce_s = coalesce_ms / 1000
+        self.max_attempts = max_attempts
+        self._pending: "OrderedDict[_Key, Dict[str, Any]]" = OrderedDict()
+        self._callbacks: List[Callable[[], None]] = []
+        self._cond = Condition()
+        self._inflight = False
+        self._flushing = 0
+        self._stopped = False
+        self._failed_attempts = 0
+        self._dropped = False
+        self.written = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self._thread: Optional[Thread] = None
+
+    def _ensure_started(self) -> None:
+        # 调用方持有 self._cond
+        if self._thread is None and not self._stopped:
+            self._thread = Thread(target=self._run, name="status-writer", daemon=True)
+            self._thread.start()
+
+    def submit(
+        self,
+        model: Type[SQLModel],
+        row_id: int,
+        values: Dict[str, Any],
+        on_commit: Optional[Callable[[], None]] = None,
+    ) -> None:
+        with self._cond:
+            self._ensure_started()
+            key = (model, row_id)
+            if key in self._pending:
+                self._pending[key].update(values)
+                self.coalesced += 1
+            else:
+                self._pending[key] = dict(values)
+            if on_commit is not None:
+                self._callbacks.append(on_commit)
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submitted update is committed.
+
+        Returns False on timeout, or when updates had to be dropped after
+        ``max_attempts`` failed commits since the previous flush.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._cond:
+            self._flushing += 1  # 有人等待时跳过合并窗口
+            self._cond.notify_all()
+            try:
+                while self._pending or self._inflight:
+                    if self._thread is None or not self._thread.is_alive():
+                        return False
+                    remaining = None if deadline is None else deadline - monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self._flushing -= 1
+            dropped, self._dropped = self._dropped, False
+        return not dropped
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopped = True
+            thread = self._thread
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "written": self.written,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if not self._pending and self._stopped:
+                    return
+                # 等一个短窗口，让同一行的后续更新合并进同一次写入
+                window_end = monotonic() + self.coalesce_s
+                while not self._stopped and not self._flushing:
+                    remaining = window_end - monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, OrderedDict()
+                callbacks, self._callbacks = self._callbacks, []
+                self._inflight = True
+            committed = False
+            try:
+                committed = self._write(batch)
+                if committed:
+                    self._run_callbacks(callbacks)
+            finally:
+                with self._cond:
+                    if not committed:
+                        self._requeue(batch, callbacks)
+                    self._inflight = False
+                    self._cond.notify_all()
+                    if not committed and self._pending and not self._stopped:
+                        # 数据库暂时不可写（锁超时、连接断开）时退避后重试
+                        self._cond.wait(min(0.1 * 2 ** self._failed_attempts, 2.0))
+
+    def _requeue(self, batch: "OrderedDict[_Key, Dict[str, Any]]", callbacks: List[Callable[[], None]]) -> None:
+        """Merge a failed batch back under newer pending updates, or drop it after ``max_attempts``."""
+        # 调用方持有 self._cond
+        self._failed_attempts += 1
+        if self._failed_attempts >= self.max_attempts:
+            logger.error(
+                "Status writer dropped %s updates after %s failed commits", len(batch), self._failed_attempts
+            )
+            self.dropped += len(batch)
+            self._dropped = True
+            self._failed_attempts = 0
+            return
+        merged: "OrderedDict[_Key, Dict[str, Any]]" = OrderedDict(batch)
+        for key, values in self._pending.items():
+            merged[key] = {**merged.get(key, {}), **values}
+        self._pending = merged
+        self._callbacks = callbacks + self._callbacks
+
+    def _write(self, batch: "OrderedDict[_Key, Dict[str, Any]]") -> bool:
+        try:
+            with Session(engine) as session:
+                for (model, row_id), values in batch.items():
+                    session.execute(update(model).where(model.id == row_id).values(**values))
+                session.commit()
+        except Exception as exc:  # pragma: no cover - 失败的批次由 _requeue 合并回队列重试
+            logger.warning("Status writer failed to commit %s updates: %s", len(batch), exc)
+            return False
+        self.written += len(batch)
+        self._failed_attempts = 0
+        return True
+
+    @staticmethod
+    def _run_callbacks(callbacks: List[Callable[[], None]]) -> None:
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Status writer on_commit callback failed: %s", exc)
+
+
+status_writer = StatusWriter(get_settings().status_writer_coalesce_ms, get_settings().status_writer_max_attempts)
+
+
+def apply(instance: SQLModel, on_commit: Optional[Callable[[], None]] = None, **values: Any) -> None:
+    """Update ``instance`` in memory now and persist the columns through the writer thread.
+
+    ``on_commit`` runs on the writer thread once the update is committed; it must not touch
+    ``instance`` (owned by the worker's session), so capture what it needs beforehand.
+    """
+    for name, value in values.items():
+        set_committed_value(instance, name, value)
+    status_writer.submit(type(instance), instance.id, values, on_commit)
+
+
+def flush(timeout: Optional[float] = None) -> bool:
+    return status_writer.flush(timeout)
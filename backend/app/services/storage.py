@@ -58,9 +58,16 @@ def convert_to_wav(resource_id: int, input_path: Path) -> Path:
 
 
 def save_uploaded_file(resource_id: int, upload: UploadFile) -> Path:
-    """Save an uploaded file to the resource directory."""
+    """Stream an uploaded file to the resource directory in fixed-size chunks."""
     resource_dir = get_resource_dir(resource_id)
-    target_path = resource_dir / upload.filename
+    # 只保留文件名部分，避免客户端提交的路径写出资源目录
+    target_path = resource_dir / Path(upload.filename or "upload").name
+    upload.file.seek(0)
     with target_path.open("wb") as out_file:
-        shutil.copyfileobj(upload.file, out_file)
+        shutil.copyfileobj(upload.file, out_file, length=settings.upload_chunk_bytes)
     return target_path
+
+
+def remove_resource_dir(resource_id: int) -> None:
+    """Best-effort cleanup for files saved before a failed transaction."""
+    shutil.rmtree(settings.storage_root / f"resource_{resource_id}", ignore_errors=True)
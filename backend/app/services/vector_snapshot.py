@@ -0,0 +1,243 @@
+"""Portable per-course vector snapshots.
+
+文件格式：``MAGIC`` + 4 字节小端 header 长度 + JSON header + npz payload。
+header 中记录 payload 的 sha256，导入时先校验再解析；payload 内为 float32/float16
+向量矩阵与 id、过滤元数据、text_hash（可选原文）等列式数组。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import os
+import struct
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+from sqlmodel import Session
+
+from ..config import get_settings
+from ..models import Chunk, Course, EmbeddingStatus
+from . import hydration, search_cache
+from .assembly import iter_course_chunk_windows
+from .stats import refresh_vector_count
+from .vectorstore import VectorStoreItem, delete_course_collection, get_vector_store, upsert_chunks
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AITVSNAP"
+FORMAT_VERSION = 1
+EXPORT_PAGE_SIZE = 5000
+IMPORT_BATCH_SIZE = 10000
+MISSING_INT = -1
+
+
+class SnapshotError(RuntimeError):
+    """Raised when a snapshot file is malformed, corrupted or incompatible."""
+
+
+def _text_hash(text: str | None) -> str:
+    # 与 embedding_pipeline 写入向量元数据的 text_hash 保持一致
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _vocab_codes(values: List[str]) -> tuple[np.ndarray, List[str]]:
+    vocab: Dict[str, int] = {}
+    codes = np.asarray([vocab.setdefault(value, len(vocab)) for value in values], dtype=np.int32)
+    return codes, list(vocab)
+
+
+def export_course_vectors(
+    course_id: int,
+    path: Path,
+    dtype: Literal["float32", "float16"] = "float32",
+    include_texts: bool = False,
+) -> Dict[str, Any]:
+    """Write every vector of a course to ``path``; return the snapshot header."""
+    target_dtype = np.dtype(dtype)
+    ids: List[int] = []
+    vectors: List[np.ndarray] = []
+    lecture_ids: List[int] = []
+    section_ids: List[int] = []
+    source_types: List[str] = []
+    versions: List[str] = []
+    text_hashes: List[str] = []
+    texts: List[bytes] = []
+    for page in get_vector_store().iter_items(course_id, EXPORT_PAGE_SIZE):
+        vectors.append(np.asarray([item.vector for item in page], dtype=np.float32).astype(target_dtype))
+        for item in page:
+            ids.append(item.chunk_id)
+            lecture_ids.append(int(item.metadata.get("lecture_id", MISSING_INT)))
+            section_ids.append(int(item.metadata.get("section_id", MISSING_INT)))
+            source_types.append(str(item.metadata.get("source_type", "")))
+            versions.append(str(item.metadata.get("embedding_version", "")))
+            text_hashes.append(str(item.metadata.get("text_hash", "")))
+            if include_texts:
+                texts.append((item.text or "").encode("utf-8"))
+    if not ids:
+        raise SnapshotError(f"course {course_id} has no vectors to export")
+
+    matrix = np.concatenate(vectors)
+    source_codes, source_vocab = _vocab_codes(source_types)
+    version_codes, version_vocab = _vocab_codes(versions)
+    arrays: Dict[str, np.ndarray] = {
+        "ids": np.asarray(ids, dtype=np.int64),
+        "vectors": matrix,
+        "lecture_ids": np.asarray(lecture_ids, dtype=np.int64),
+        "section_ids": np.asarray(section_ids, dtype=np.int64),
+        "source_types": source_codes,
+        "source_type_vocab": np.asarray(source_vocab, dtype=str),
+        "versions": version_codes,
+        "version_vocab": np.asarray(version_vocab, dtype=str),
+        "text_hashes": np.asarray(text_hashes, dtype="S16"),
+    }
+    if include_texts:
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        arrays["text_offsets"] = offsets
+        arrays["texts"] = np.frombuffer(b"".join(texts), dtype=np.uint8)
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    payload = buffer.getvalue()
+    header = {
+        "format_version": FORMAT_VERSION,
+        "course_id": course_id,
+        "count": len(ids),
+        "dim": int(matrix.shape[1]),
+        "dtype": target_dtype.name,
+        "embedding_versions": dict(Counter(versions)),
+        "has_texts": include_texts,
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(MAGIC)
+        handle.write(struct.pack("<I", len(header_bytes)))
+        handle.write(header_bytes)
+        handle.write(payload)
+    os.replace(tmp_path, path)
+    logger.info("Exported %s vectors of course %s to %s (%s bytes)", len(ids), course_id, path, path.stat().st_size)
+    return header
+
+
+def read_snapshot(path: Path) -> tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Read and checksum-verify a snapshot; return ``(header, arrays)``."""
+    with path.open("rb") as handle:
+        if handle.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError("not a vector snapshot file")
+        (header_len,) = struct.unpack("<I", handle.read(4))
+        header = json.loads(handle.read(header_len).decode("utf-8"))
+        payload = handle.read()
+    if header.get("format_version") != FORMAT_VERSION:
+        raise SnapshotError(f"unsupported snapshot format {header.get('format_version')}")
+    if hashlib.sha256(payload).hexdigest() != header.get("sha256"):
+        raise SnapshotError("snapshot checksum mismatch")
+    with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    if arrays["ids"].shape[0] != header["count"] or arrays["vectors"].shape != (header["count"], header["dim"]):
+        raise SnapshotError("snapshot arrays do not match header")
+    return header, arrays
+
+
+def _current_chunk_hashes(session: Session, course_id: int) -> Dict[int, str]:
+    hashes: Dict[int, str] = {}
+    for window in iter_course_chunk_windows(session, course_id, EXPORT_PAGE_SIZE, columns=(Chunk.id, Chunk.text)):
+        hashes.update((row.id, _text_hash(row.text)) for row in window)
+    return hashes
+
+
+def import_course_vectors(
+    session: Session,
+    course_id: int,
+    path: Path,
+    replace: bool = True,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Load a snapshot into the vector store for ``course_id`` and mark the course embedded.
+
+    Rows whose chunk no longer exists or whose text changed since export
+    (``text_hash`` mismatch) are skipped so stale vectors never get served.
+    """
+    course = session.get(Course, course_id)
+    if not course:
+        raise SnapshotError(f"course {course_id} not found")
+    header, arrays = read_snapshot(path)
+
+    current = _current_chunk_hashes(session, course_id)
+    ids = arrays["ids"]
+    hashes = np.char.decode(arrays["text_hashes"], "ascii")
+    keep = np.asarray(
+        [current.get(int(chunk_id)) == text_hash for chunk_id, text_hash in zip(ids.tolist(), hashes.tolist())],
+        dtype=bool,
+    )
+    rows = np.flatnonzero(keep)
+    source_vocab = arrays["source_type_vocab"].tolist()
+    version_vocab = arrays["version_vocab"].tolist()
+    store_texts = header.get("has_texts") and get_settings().vector_store_documents
+
+    if replace:
+        delete_course_collection(course_id)
+    imported = 0
+    for start in range(0, rows.shape[0], batch_size):
+        batch = rows[start : start + batch_size]
+        vectors = arrays["vectors"][batch].astype(np.float32)
+        items: List[VectorStoreItem] = []
+        for vector, row in zip(vectors, batch.tolist()):
+            metadata: Dict[str, Any] = {
+                "course_id": course_id,
+                "lecture_id": int(arrays["lecture_ids"][row]),
+                "section_id": int(arrays["section_ids"][row]),
+                "source_type": source_vocab[int(arrays["source_types"][row])],
+                "embedding_version": version_vocab[int(arrays["versions"][row])],
+                "text_hash": hashes[row],
+            }
+            text: Optional[str] = None
+            if store_texts:
+                begin, end = int(arrays["text_offsets"][row]), int(arrays["text_offsets"][row + 1])
+                text = bytes(arrays["texts"][begin:end]).decode("utf-8")
+            items.append(
+                VectorStoreItem(
+                    chunk_id=int(ids[row]),
+                    text=text,
+                    vector=vector.tolist(),
+                    metadata={k: v for k, v in metadata.items() if v not in (MISSING_INT, "")},
+                )
+            )
+        imported += upsert_chunks(course_id, items)
+
+    kept_versions = Counter(version_vocab[int(code)] for code in arrays["versions"][rows].tolist())
+    missing = len(set(current) - set(ids[rows].tolist()))
+    course.embedding_status = EmbeddingStatus.done
+    course.embedding_progress = 100.0 if not missing else round((len(current) - missing) / len(current) * 100, 2)
+    course.embedding_error = f"{missing} chunks missing from snapshot" if missing else None
+    meta = {k: v for k, v in (course.meta or {}).items() if k not in {"embedding_checkpoint", "embedding_failures"}}
+    if kept_versions:
+        meta["embedding_version"] = kept_versions.most_common(1)[0][0]
+    course.meta = meta
+    refresh_vector_count(course)
+    course.updated_at = datetime.utcnow()
+    session.add(course)
+    session.commit()
+    search_cache.invalidate_course(course_id)
+    hydration.invalidate_course(course_id)
+
+    report = {
+        "course_id": course_id,
+        "snapshot_course_id": header["course_id"],
+        "imported": imported,
+        "skipped_stale": int(ids.shape[0] - rows.shape[0]),
+        "missing_chunks": missing,
+        "embedding_versions": dict(kept_versions),
+    }
+    logger.info("Imported vector snapshot %s: %s", path, report)
+    return report
@@ -0,0 +1,113 @@
+"""Per-course vector storage behind a pluggable backend (Chroma or memory-mapped NumPy)."""
+
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ...config import get_settings
+from .base import (
+    FINGERPRINT_KEYS,
+    RebuildNotSupportedError,
+    VectorQuery,
+    VectorStore,
+    VectorStoreError,
+    VectorStoreItem,
+    collection_name,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> VectorStore:
+    """Return the backend selected by ``vector_store_backend``."""
+    settings = get_settings()
+    if settings.vector_store_backend == "numpy":
+        from .numpy_store import NumpyVectorStore
+
+        return NumpyVectorStore(
+            settings.vector_index_dir,
+            dtype=settings.embedding_dtype,
+            ivf_min_vectors=settings.vector_ivf_min_vectors,
+            nprobe=settings.vector_ivf_nprobe,
+        )
+    from .chroma import ChromaVectorStore
+
+    return ChromaVectorStore()
+
+
+def list_course_collections() -> List[str]:
+    """List all course collections (debug/inspection helper)."""
+    return get_vector_store().list_collections()
+
+
+def delete_course_collection(course_id: int) -> bool:
+    """Delete the collection for a course; return True if removed."""
+    return get_vector_store().delete(course_id)
+
+
+def count_course_collection(course_id: int) -> int:
+    """Return item count for a course collection."""
+    return get_vector_store().count(course_id)
+
+
+def course_vector_space(course_id: int) -> Optional[Tuple[str, int]]:
+    """Return ``(embedding_version, dimension)`` sampled from a course collection (None when empty or missing)."""
+    return get_vector_store().vector_space(course_id)
+
+
+def fetch_course_fingerprints(course_id: int, chunk_ids: Sequence[int]) -> Dict[int, Tuple[str, str]]:
+    """Return ``{chunk_id: (embedding_version, text_hash)}`` for the given chunks that already have vectors."""
+    return get_vector_store().fingerprints(course_id, chunk_ids)
+
+
+def upsert_chunks(course_id: int, items: Iterable[VectorStoreItem]) -> int:
+    """Upsert chunk vectors into the course collection."""
+    batch = list(items)
+    if not batch:
+        return 0
+    written = get_vector_store().upsert(course_id, batch)
+    logger.info("Upserted %s chunk vectors into collection %s", written, collection_name(course_id))
+    return written
+
+
+def rebuild_course_collection(course_id: int, params: Dict[str, object]) -> int:
+    """Rebuild a course index with new index parameters; return the vector count."""
+    return get_vector_store().rebuild(course_id, params)
+
+
+def search_course_chunks(
+    course_id: int,
+    query_vector: List[float],
+    top_k: int,
+    filters: Optional[Dict[str, int | str]] = None,
+) -> List[Dict[str, object]]:
+    """Query a course collection and return structured results."""
+    return get_vector_store().search(course_id, query_vector, top_k, filters)
+
+
+def search_course_chunks_batch(course_id: int, queries: Sequence[VectorQuery]) -> List[List[Dict[str, object]]]:
+    """Run several queries against a course collection in one vectorized lookup."""
+    return get_vector_store().search_many(course_id, queries)
+
+
+__all__ = [
+    "FINGERPRINT_KEYS",
+    "RebuildNotSupportedError",
+    "VectorQuery",
+    "VectorStore",
+    "VectorStoreError",
+    "VectorStoreItem",
+    "count_course_collection",
+    "course_vector_space",
+    "delete_course_collection",
+    "fetch_course_fingerprints",
+    "get_vector_store",
+    "list_course_collections",
+    "rebuild_course_collection",
+    "search_course_chunks",
+    "search_course_chunks_batch",
+    "upsert_chunks",
+]
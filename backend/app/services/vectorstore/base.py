@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Metadata keys the search API can filter on; every backend must support them.
+FILTER_KEYS = ("lecture_id", "section_id", "source_type")
+# 写入向量元数据、仅供增量 embedding 判断是否可复用的指纹字段，不对外返回
+FINGERPRINT_KEYS = frozenset({"embedding_version", "text_hash"})
+
+
+class VectorStoreError(RuntimeError):
+    """Raised when vector store operations fail."""
+
+
+class RebuildNotSupportedError(VectorStoreError):
+    """Raised by backends whose index has no tunable parameters to rebuild with."""
+
+
+@dataclass
+class VectorStoreItem:
+    chunk_id: int
+    text: Optional[str]  # None 表示不在向量库中保存原文
+    vector: List[float]
+    metadata: Dict[str, int | str]
+
+
+@dataclass
+class VectorQuery:
+    vector: List[float]
+    top_k: int
+    filters: Optional[Dict[str, int | str]] = None
+    # 为 True 时结果额外带 ``embedding``（float32 ndarray），供 MMR 等重排直接使用
+    include_embeddings: bool = False
+
+
+def collection_name(course_id: int) -> str:
+    return f"course_{course_id}"
+
+
+class VectorStore(ABC):
+    """Per-course vector collection backend.
+
+    Scores returned by :meth:`search` are cosine similarities (higher is
+    better) regardless of how the backend measures distance internally.
+    """
+
+    @abstractmethod
+    def upsert(self, course_id: int, items: List[VectorStoreItem]) -> int:
+        """Insert or replace vectors; return the number written."""
+
+    @abstractmethod
+    def search(
+        self,
+        course_id: int,
+        query_vector: List[float],
+        top_k: int,
+        filters: Optional[Dict[str, int | str]] = None,
+    ) -> List[Dict[str, object]]:
+        """Return ``{chunk_id, text, metadata, score}`` dicts, best first."""
+
+    def search_many(self, course_id: int, queries: Sequence[VectorQuery]) -> List[List[Dict[str, object]]]:
+        """Run several queries at once; results are returned in input order.
+
+        Backends must attach an ``embedding`` to each result when the query sets
+        ``include_embeddings``; this fallback only covers plain ``search``.
+        """
+        if any(query.include_embeddings for query in queries):
+            raise VectorStoreError("embeddings_not_supported")
+        return [self.search(course_id, query.vector, query.top_k, query.filters) for query in queries]
+
+    @abstractmethod
+    def count(self, course_id: int) -> int:
+        """Return the number of vectors stored for a course."""
+
+    @abstractmethod
+    def delete(self, course_id: int) -> bool:
+        """Drop a course collection; return True if something was removed."""
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        """List collection names (debug/inspection helper)."""
+
+    @abstractmethod
+    def fingerprints(self, course_id: int, chunk_ids: Sequence[int]) -> Dict[int, Tuple[str, str]]:
+        """Return ``{chunk_id: (embedding_version, text_hash)}`` for those of ``chunk_ids`` that are stored."""
+
+    @abstractmethod
+    def vector_space(self, course_id: int) -> Optional[Tuple[str, int]]:
+        """Return ``(embedding_version, dimension)`` of one stored vector, or None when the course is empty."""
+
+    @abstractmethod
+    def iter_items(self, course_id: int, page_size: int = 5000) -> Iterator[List[VectorStoreItem]]:
+        """Yield every stored vector (with text/metadata) in pages, for snapshots and copies."""
+
+    def rebuild(self, course_id: int, params: Dict[str, object]) -> int:
+        """Rebuild a course index with new index parameters; return the vector count."""
+        raise RebuildNotSupportedError("rebuild_not_supported")
+
+
+def normalize_filters(filters: Optional[Dict[str, int | str]]) -> Dict[str, int | str]:
+    return {k: v for k, v in (filters or {}).items() if v is not None}
+
+
+def group_by_filters(queries: Sequence[VectorQuery]) -> Dict[Tuple[Tuple[str, int | str], ...], List[int]]:
+    """Group query positions by identical (normalized) filters so each group runs as one lookup."""
+    groups: Dict[Tuple[Tuple[str, int | str], ...], List[int]] = {}
+    for position, query in enumerate(queries):
+        key = tuple(sorted(normalize_filters(query.filters).items()))
+        groups.setdefault(key, []).append(position)
+    return groups
@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+import logging
+import time
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from chromadb import PersistentClient
+from chromadb.api.models.Collection import Collection
+
+from ...config import get_settings
+from .base import (
+    VectorQuery,
+    VectorStore,
+    VectorStoreError,
+    VectorStoreItem,
+    collection_name,
+    group_by_filters,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@lru_cache(maxsize=1)
+def get_chroma_client() -> PersistentClient:
+    """Return a cached persistent Chroma client."""
+    return PersistentClient(path=str(settings.chroma_db_dir))
+
+
+HNSW_PARAM_KEYS = {
+    "space": "hnsw:space",
+    "m": "hnsw:M",
+    "construction_ef": "hnsw:construction_ef",
+    "search_ef": "hnsw:search_ef",
+}
+REBUILD_PAGE_SIZE = 5000
+REBUILD_RENAME_ATTEMPTS = 3
+
+
+def hnsw_metadata(params: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """Build Chroma collection metadata from deployment defaults plus overrides."""
+    merged: Dict[str, object] = {
+        "space": settings.chroma_hnsw_space,
+        "m": settings.chroma_hnsw_m,
+        "construction_ef": settings.chroma_hnsw_construction_ef,
+        "search_ef": settings.chroma_hnsw_search_ef,
+    }
+    merged.update({k: v for k, v in (params or {}).items() if v is not None})
+    return {HNSW_PARAM_KEYS[key]: value for key, value in merged.items() if key in HNSW_PARAM_KEYS}
+
+
+def _distance_to_score(distance: float, space: str) -> float:
+    # 向量均已 L2 归一化：l2 返回平方距离 = 2 - 2cos，cosine/ip 返回 1 - cos
+    if space == "l2":
+        return 1 - float(distance) / 2
+    return 1 - float(distance)
+
+
+def get_course_collection(course_id: int) -> Collection:
+    """Fetch (or create with the configured HNSW parameters) the Chroma collection for a course."""
+    client = get_chroma_client()
+    name = collection_name(course_id)
+    try:
+        return client.get_collection(name=name)
+    except ValueError:
+        pass
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.exception("Failed to fetch collection %s: %s", name, exc)
+        raise VectorStoreError(f"collection_init_failed:{name}") from exc
+    try:
+        return client.get_or_create_collection(name=name, metadata=hnsw_metadata())
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.exception("Failed to initialize collection %s: %s", name, exc)
+        raise VectorStoreError(f"collection_init_failed:{name}") from exc
+
+
+def _where_clause(filters: Dict[str, int | str]) -> Optional[Dict[str, object]]:
+    # Chroma 要求多个条件显式使用 $and
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return dict(filters)
+    return {"$and": [{key: value} for key, value in filters.items()]}
+
+
+def _format_row(response: Dict[str, object], row: int, space: str) -> List[Dict[str, object]]:
+    ids = (response.get("ids") or [[]])[row]
+    documents = (response.get("documents") or [[None] * len(ids)])[row]
+    metadatas = (response.get("metadatas") or [[None] * len(ids)])[row]
+    distances = response.get("distances") or response.get("similarities")
+    distance_row = distances[row] if distances else [None] * len(ids)
+    embeddings = response.get("embeddings")
+    embedding_row = embeddings[row] if embeddings is not None else None
+
+    results: List[Dict[str, object]] = []
+    for position, (chunk_id, text, metadata, distance) in enumerate(zip(ids, documents, metadatas, distance_row)):
+        score = None
+        if distance is not None:
+            score = _distance_to_score(distance, space)
+        result: Dict[str, object] = {
+            "chunk_id": int(chunk_id),
+            "text": text,
+            "metadata": metadata or {},
+            "score": score,
+        }
+        if embedding_row is not None:
+            result["embedding"] = np.asarray(embedding_row[position], dtype=np.float32)
+        results.append(result)
+    return results
+
+
+class ChromaVectorStore(VectorStore):
+    """Chroma ``PersistentClient`` backend with one collection per course.
+
+    Collection handles and vector counts are cached per course. Counts are
+    seeded by one ``count()`` call and then adjusted on upsert/delete, so the
+    search path issues a single ``query``. A handle that fails (e.g. the
+    collection was recreated by another process) is dropped and re-fetched.
+    Fetching a handle takes a per-course lock that ``rebuild`` holds while it
+    swaps collection names, so a search cannot auto-create an empty
+    collection in the gap.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._collections: Dict[int, Collection] = {}
+        self._counts: Dict[int, int] = {}
+        self._course_locks: Dict[int, Lock] = {}
+
+    def _course_lock(self, course_id: int) -> Lock:
+        with self._lock:
+            return self._course_locks.setdefault(course_id, Lock())
+
+    def _invalidate(self, course_id: int) -> None:
+        with self._lock:
+            self._collections.pop(course_id, None)
+            self._counts.pop(course_id, None)
+
+    def _collection(self, course_id: int, create: bool = True) -> Optional[Collection]:
+        with self._lock:
+            cached = self._collections.get(course_id)
+        if cached is not None:
+            return cached
+        with self._course_lock(course_id):
+            with self._lock:
+                cached = self._collections.get(course_id)
+            if cached is not None:
+                return cached
+            collection = get_course_collection(course_id) if create else self._get_existing_collection(course_id)
+            if collection is not None:
+                with self._lock:
+                    self._collections[course_id] = collection
+        return collection
+
+    def list_collections(self) -> List[str]:
+        client = get_chroma_client()
+        try:
+            return [collection.name for collection in client.list_collections()]
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.exception("Failed to list Chroma collections: %s", exc)
+            raise VectorStoreError("list_collections_failed") from exc
+
+    def delete(self, course_id: int) -> bool:
+        client = get_chroma_client()
+        name = collection_name(course_id)
+        self._invalidate(course_id)
+        try:
+            client.delete_collection(name=name)
+            logger.info("Deleted Chroma collection %s", name)
+            return True
+        except ValueError:
+            logger.info("Chroma collection %s not found when deleting", name)
+            return False
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.exception("Failed to delete collection %s: %s", name, exc)
+            raise VectorStoreError(f"delete_collection_failed:{name}") from exc
+
+    def _get_existing_collection(self, course_id: int) -> Optional[Collection]:
+        client = get_chroma_client()
+        name = collection_name(course_id)
+        try:
+            return client.get_collection(name=name)
+        except ValueError:
+            return None
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.exception("Failed to fetch collection %s: %s", name, exc)
+            raise VectorStoreError("collection_fetch_failed") from exc
+
+    def count(self, course_id: int) -> int:
+        with self._lock:
+            cached = self._counts.get(course_id)
+        if cached is not None:
+            return cached
+        collection = self._collection(course_id, create=False)
+        if collection is None:
+            return 0
+        try:
+            value = collection.count()
+        except Exception as exc:  # pragma: no cover - defensive logging
+            self._invalidate(course_id)
+            logger.exception("Failed to count collection %s: %s", collection_name(course_id), exc)
+            raise VectorStoreError("collection_count_failed") from exc
+        with self._lock:
+            self._counts[course_id] = value
+        return value
+
+    def fingerprints(self, course_id: int, chunk_ids: Sequence[int]) -> Dict[int, Tuple[str, str]]:
+        if not chunk_ids:
+            return {}
+        collection = self._collection(course_id, create=False)
+        if collection is None:
+            return {}
+        try:
+            response = collection.get(ids=[str(chunk_id) for chunk_id in chunk_ids], include=["metadatas"])
+        except Exception as exc:  # pragma: no cover - defensive logging
+            self._invalidate(course_id)
+            logger.exception("Failed to read fingerprints from %s: %s", collection_name(course_id), exc)
+            raise VectorStoreError("fingerprint_fetch_failed") from exc
+        fingerprints: Dict[int, Tuple[str, str]] = {}
+        for chunk_id, metadata in zip(response.get("ids") or [], response.get("metadatas") or []):
+            metadata = metadata or {}
+            fingerprints[int(chunk_id)] = (
+                str(metadata.get("embedding_version", "")),
+                str(metadata.get("text_hash", "")),
+            )
+        return fingerprints
+
+    def vector_space(self, course_id: int) -> Optional[Tuple[str, int]]:
+        collection = self._collection(course_id, create=False)
+        if collection is None:
+            return None
+        try:
+            sample = collection.get(include=["embeddings", "metadatas"], limit=1)
+        except Exception as exc:  # pragma: no cover - defensive logging
+            self._invalidate(course_id)
+            logger.exception("Failed to sample %s: %s", collection_name(course_id), exc)
+            raise VectorStoreError("collection_read_failed") from exc
+        embeddings = sample.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return None
+        metadata = (sample.get("metadatas") or [None])[0] or {}
+        return str(metadata.get("embedding_version", "")), len(embeddings[0])
+
+    def iter_items(self, course_id: int, page_size: int = REBUILD_PAGE_SIZE) -> Iterator[List[VectorStoreItem]]:
+        collection = self._collection(course_id, create=False)
+        if collection is None:
+            return
+        offset = 0
+        while True:
+            try:
+                page = collection.get(
+                    include=["embeddings", "documents", "metadatas"],
+                    limit=page_size,
+                    offset=offset,
+                )
+            except Exception as exc:  # pragma: no cover - defensive logging
+                self._invalidate(course_id)
+                logger.exception("Failed to read vectors from %s: %s", collection_name(course_id), exc)
+                raise VectorStoreError("collection_read_failed") from exc
+            ids = page.get("ids") or []
+            documents = page.get("documents") or [None] * len(ids)
+            if ids:
+                yield [
+                    VectorStoreItem(
+                        chunk_id=int(chunk_id),
+                        text=text or None,
+                        vector=list(vector),
+                        metadata=metadata or {},
+                    )
+                    for chunk_id, vector, text, metadata in zip(ids, page["embeddings"], documents, page["metadatas"])
+                ]
+            if len(ids) < page_size:
+                return
+            offset += page_size
+
+    def upsert(self, course_id: int, items: List[VectorStoreItem]) -> int:
+        if not items:
+            return 0
+
+        ids = [str(item.chunk_id) for item in items]
+        embeddings = [item.vector for item in items]
+        documents = None if all(item.text is None for item in items) else [item.text or "" for item in items]
+        metadatas = [item.metadata for item in items]
+        with self._lock:
+            track_count = course_id in self._counts
+        for attempt in range(2):
+            collection = self._collection(course_id)
+            try:
+                # 只有已缓存计数时才需要知道哪些 id 是新增的
+                existing = len(collection.get(ids=ids, include=[])["ids"]) if track_count else 0
+                collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+                break
+            except Exception as exc:  # pragma: no cover - defensive logging
+                self._invalidate(course_id)
+                track_count = False
+                if attempt == 0:
+                    continue
+                logger.exception("Failed to upsert %s vectors into %s: %s", len(items), collection_name(course_id), exc)
+                raise VectorStoreError("upsert_failed") from exc
+        with self._lock:
+            if track_count and course_id in self._counts:
+                self._counts[course_id] += len(ids) - existing
+        return len(items)
+
+    def search(
+        self,
+        course_id: int,
+        query_vector: List[float],
+        top_k: int,
+        filters: Optional[Dict[str, int | str]] = None,
+    ) -> List[Dict[str, object]]:
+        return self.search_many(course_id, [VectorQuery(vector=query_vector, top_k=top_k, filters=filters)])[0]
+
+    def search_many(self, course_id: int, queries: Sequence[VectorQuery]) -> List[List[Dict[str, object]]]:
+        """Queries sharing the same filters go to Chroma as one multi-embedding ``query``."""
+        results: List[List[Dict[str, object]]] = [[] for _ in queries]
+        for where, positions in group_by_filters(queries).items():
+            n_results = max(queries[pos].top_k for pos in positions)
+            with_embeddings = any(queries[pos].include_embeddings for pos in positions)
+            response, space = self._query(
+                course_id,
+                [queries[pos].vector for pos in positions],
+                n_results,
+                _where_clause(dict(where)),
+                with_embeddings,
+            )
+            if response is None:
+                continue
+            for row, pos in enumerate(positions):
+                rows = _format_row(response, row, space)[: queries[pos].top_k]
+                if with_embeddings and not queries[pos].include_embeddings:
+                    for item in rows:
+                        item.pop("embedding", None)
+                results[pos] = rows
+        return results
+
+    def _query(
+        self,
+        course_id: int,
+        vectors: List[List[float]],
+        n_results: int,
+        where: Optional[Dict[str, object]],
+        with_embeddings: bool = False,
+    ) -> Tuple[Optional[Dict[str, object]], str]:
+        include = ["documents", "metadatas", "distances"]
+        if with_embeddings:
+            include.append("embeddings")
+        for attempt in range(2):
+            collection = self._collection(course_id)
+            try:
+                response = collection.query(
+                    query_embeddings=vectors, n_results=n_results, where=where, include=include
+                )
+                return response, (collection.metadata or {}).get("hnsw:space", "l2")
+            except Exception as exc:  # pragma: no cover - defensive logging
+                # 句柄可能已失效，或集合为空：重新获取句柄并确认计数后再决定是否报错
+                self._invalidate(course_id)
+                if self.count(course_id) == 0:
+                    return None, "l2"
+                if attempt == 0:
+                    continue
+                logger.exception("Failed to query collection %s: %s", collection_name(course_id), exc)
+                raise VectorStoreError("query_failed") from exc
+        return None, "l2"
+
+    def rebuild(self, course_id: int, params: Dict[str, object]) -> int:
+        """Copy a course collection into a new one created with ``params``, then swap names."""
+        client = get_chroma_client()
+        name = collection_name(course_id)
+        tmp_name = f"{name}__rebuild"
+        source = self._get_existing_collection(course_id)
+        try:
+            if source is None:
+                with self._course_lock(course_id):
+                    client.create_collection(name=name, metadata=hnsw_metadata(params))
+                return 0
+            current = {
+                key: source.metadata[meta_key]
+                for key, meta_key in HNSW_PARAM_KEYS.items()
+                if source.metadata and meta_key in source.metadata
+            }
+            try:
+                client.delete_collection(name=tmp_name)
+            except ValueError:
+                pass
+            target = client.create_collection(name=tmp_name, metadata=hnsw_metadata({**current, **params}))
+            copied = _copy_collection(source, target)
+            # 换名期间持有课程锁：并发搜索的 _collection() 会等待，而不是自动创建一个空集合
+            with self._course_lock(course_id):
+                self._invalidate(course_id)
+                client.delete_collection(name=name)
+                target = self._swap_in(client, target, name)
+        except VectorStoreError:
+            raise
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.exception("Failed to rebuild collection %s: %s", name, exc)
+            raise VectorStoreError(f"rebuild_failed:{name}") from exc
+        finally:
+            self._invalidate(course_id)
+        logger.info("Rebuilt Chroma collection %s with %s vectors (%s)", name, copied, target.metadata)
+        return copied
+
+    @staticmethod
+    def _swap_in(client: PersistentClient, target: Collection, name: str) -> Collection:
+        """Rename ``target`` to ``name``; if renaming keeps failing, copy it into a fresh ``name``."""
+        for attempt in range(1, REBUILD_RENAME_ATTEMPTS + 1):
+            try:
+                target.modify(name=name)
+                return target
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.warning("Renaming %s to %s failed (attempt %s): %s", target.name, name, attempt, exc)
+                time.sleep(0.2 * attempt)
+        # 原集合已删除，不能让课程停在空索引上：把临时集合整份拷回原名
+        try:
+            restored = client.create_collection(name=name, metadata=target.metadata)
+            _copy_collection(target, restored)
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.exception("Failed to restore %s from %s; vectors remain in %s", name, target.name, target.name)
+            raise VectorStoreError(f"rebuild_swap_failed:{name}") from exc
+        try:
+            client.delete_collection(name=target.name)
+        except Exception as exc:  # pragma: no cover - 临时集合残留不影响服务，下次重建前会先删除
+            logger.warning("Failed to drop %s after restore: %s", target.name, exc)
+        return restored
+
+
+def _copy_collection(source: Collection, target: Collection) -> int:
+    copied = 0
+    offset = 0
+    while True:
+        page = source.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=REBUILD_PAGE_SIZE,
+            offset=offset,
+        )
+        ids = page.get("ids") or []
+        if ids:
+            target.upsert(
+                ids=ids,
+                embeddings=page["embeddings"],
+                # 只存 id + 元数据的集合没有 documents，原样保持
+                documents=page["documents"] if any(page["documents"] or []) else None,
+                metadatas=page["metadatas"],
+            )
+            copied += len(ids)
+        if len(ids) < REBUILD_PAGE_SIZE:
+            return copied
+        offset += REBUILD_PAGE_SIZE
@@ -0,0 +1,598 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass, replace
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base import (
+    VectorQuery,
+    VectorStore,
+    VectorStoreError,
+    VectorStoreItem,
+    collection_name,
+    group_by_filters,
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+# 分块计算打分，避免 float16 矩阵整体转换成 float32 临时副本
+SCORE_BLOCK_ROWS = 65536
+# 过滤后剩余行占比低于该值时只对命中的行做点积，否则整段点积后再取子集
+SPARSE_FILTER_RATIO = 0.5
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+MISSING_INT = -1
+
+
+@dataclass
+class _Segment:
+    name: str
+    ids: np.ndarray
+    vectors: np.ndarray
+    lecture_ids: np.ndarray
+    section_ids: np.ndarray
+    source_types: np.ndarray
+    versions: np.ndarray
+    text_hashes: np.ndarray
+    text_offsets: np.ndarray
+    texts: np.ndarray
+    centroids: Optional[np.ndarray] = None
+    list_offsets: Optional[np.ndarray] = None
+    # False for rows shadowed by the same chunk id in a newer segment; None means all alive.
+    alive: Optional[np.ndarray] = None
+
+    @property
+    def size(self) -> int:
+        return int(self.ids.shape[0])
+
+    def text(self, row: int) -> str:
+        start, end = int(self.text_offsets[row]), int(self.text_offsets[row + 1])
+        return bytes(self.texts[start:end]).decode("utf-8")
+
+
+@dataclass
+class _CourseIndex:
+    stamp: Tuple[int, int]
+    manifest: Dict[str, Any]
+    segments: List[_Segment]
+
+    @property
+    def count(self) -> int:
+        return int(self.manifest.get("count", 0))
+
+
+def _save_array(directory: Path, name: str, array: np.ndarray) -> None:
+    np.save(directory / f"{name}.npy", np.ascontiguousarray(array), allow_pickle=False)
+
+
+def _load_array(directory: Path, name: str) -> np.ndarray:
+    return np.load(directory / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+
+
+def _encode_texts(texts: Sequence[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    if texts:
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(texts), dtype=np.uint8)
+
+
+def _spherical_kmeans(vectors: np.ndarray, n_lists: int, seed: int = 0) -> np.ndarray:
+    """Cluster L2-normalized vectors by cosine similarity; return float32 centroids."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(vectors.shape[0], n_lists * KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(vectors[rng.choice(vectors.shape[0], sample_size, replace=False)], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        sums[empty] = centroids[empty]
+        norms[empty] = 1.0
+        centroids = sums / norms
+    return centroids
+
+
+def _assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assign = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], SCORE_BLOCK_ROWS):
+        block = np.asarray(vectors[start : start + SCORE_BLOCK_ROWS], dtype=np.float32)
+        assign[start : start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def _score(vectors: np.ndarray, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Score rows against a ``(dim, n_queries)`` matrix; return ``(n_rows, n_queries)``."""
+    if rows is not None:
+        return np.asarray(vectors[rows], dtype=np.float32) @ queries
+    scores = np.empty((vectors.shape[0], queries.shape[1]), dtype=np.float32)
+    for start in range(0, vectors.shape[0], SCORE_BLOCK_ROWS):
+        block = np.asarray(vectors[start : start + SCORE_BLOCK_ROWS], dtype=np.float32)
+        scores[start : start + block.shape[0]] = block @ queries
+    return scores
+
+
+def _top_rows(rows: np.ndarray, scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if rows.shape[0] > top_k:
+        best = np.argpartition(scores, -top_k)[-top_k:]
+        return rows[best], scores[best]
+    return rows, scores
+
+
+class NumpyVectorStore(VectorStore):
+    """Memory-mapped flat/IVF index stored as NumPy arrays, one directory per course.
+
+    Each course is a small log-structured set of immutable segments listed in
+    ``manifest.json``. Upserts append a segment and merge the tail whenever the
+    previous segment is not larger than the new one, so total write volume stays
+    O(N log N). Segments are opened with ``mmap_mode="r"``, letting API workers
+    share vectors through the page cache; segments at or above
+    ``ivf_min_vectors`` rows are partitioned into IVF lists and searched by
+    probing the ``nprobe`` nearest centroids.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        dtype: str = "float32",
+        ivf_min_vectors: int = 50000,
+        nprobe: int = 8,
+    ) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self._cache: Dict[int, _CourseIndex] = {}
+        self._cache_lock = Lock()
+        self._write_locks: Dict[int, Lock] = {}
+
+    # ------------------------------------------------------------------ paths / loading
+
+    def _course_dir(self, course_id: int) -> Path:
+        return self.root / collection_name(course_id)
+
+    def _write_lock(self, course_id: int) -> Lock:
+        with self._cache_lock:
+            return self._write_locks.setdefault(course_id, Lock())
+
+    def _load(self, course_id: int) -> Optional[_CourseIndex]:
+        manifest_path = self._course_dir(course_id) / MANIFEST_NAME
+        for attempt in range(2):
+            try:
+                stat = manifest_path.stat()
+            except FileNotFoundError:
+                with self._cache_lock:
+                    self._cache.pop(course_id, None)
+                return None
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+            with self._cache_lock:
+                cached = self._cache.get(course_id)
+            if cached is not None and cached.stamp == stamp:
+                return cached
+            try:
+                index = self._open(course_id, manifest_path, stamp)
+            except FileNotFoundError as exc:
+                # 另一个进程刚完成合并并删除了旧段，重新读取 manifest
+                if attempt == 0:
+                    continue
+                raise VectorStoreError("index_open_failed") from exc
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.exception("Failed to open vector index for course %s: %s", course_id, exc)
+                raise VectorStoreError("index_open_failed") from exc
+            with self._cache_lock:
+                self._cache[course_id] = index
+            return index
+        return None
+
+    def _open(self, course_id: int, manifest_path: Path, stamp: Tuple[int, int]) -> _CourseIndex:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        course_dir = manifest_path.parent
+        segments = _mark_shadowed_rows(
+            [self._open_segment(course_dir / entry["name"]) for entry in manifest["segments"]]
+        )
+        return _CourseIndex(stamp=stamp, manifest=manifest, segments=segments)
+
+    @staticmethod
+    def _open_segment(directory: Path) -> _Segment:
+        texts_path = directory / "texts.bin"
+        if texts_path.stat().st_size:
+            texts = np.memmap(texts_path, dtype=np.uint8, mode="r")
+        else:
+            texts = np.zeros(0, dtype=np.uint8)
+        has_ivf = (directory / "centroids.npy").exists()
+        return _Segment(
+            name=directory.name,
+            ids=_load_array(directory, "ids"),
+            vectors=_load_array(directory, "vectors"),
+            lecture_ids=_load_array(directory, "lecture_ids"),
+            section_ids=_load_array(directory, "section_ids"),
+            source_types=_load_array(directory, "source_types"),
+            versions=_load_array(directory, "versions"),
+            text_hashes=_load_array(directory, "text_hashes"),
+            text_offsets=_load_array(directory, "text_offsets"),
+            texts=texts,
+            centroids=np.asarray(_load_array(directory, "centroids")) if has_ivf else None,
+            list_offsets=np.asarray(_load_array(directory, "list_offsets")) if has_ivf else None,
+        )
+
+    # ------------------------------------------------------------------ writing
+
+    def _write_segment(self, course_dir: Path, name: str, columns: Dict[str, Any]) -> None:
+        tmp_dir = course_dir / f".{name}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        vectors = np.asarray(columns["vectors"], dtype=self.dtype)
+        if vectors.shape[0] >= self.ivf_min_vectors:
+            n_lists = int(np.clip(np.sqrt(vectors.shape[0]), 16, 4096))
+            centroids = _spherical_kmeans(vectors, n_lists)
+            assign = _assign_lists(vectors, centroids)
+            order = np.argsort(assign, kind="stable")
+            list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assign, minlength=n_lists), out=list_offsets[1:])
+            _save_array(tmp_dir, "centroids", centroids)
+            _save_array(tmp_dir, "list_offsets", list_offsets)
+            columns = {
+                key: [value[i] for i in order] if isinstance(value, list) else value[order]
+                for key, value in columns.items()
+            }
+            vectors = np.asarray(columns["vectors"], dtype=self.dtype)
+
+        text_offsets, texts = _encode_texts(columns["texts"])
+        _save_array(tmp_dir, "vectors", vectors)
+        _save_array(tmp_dir, "text_offsets", text_offsets)
+        texts.tofile(tmp_dir / "texts.bin")
+        for key in ("ids", "lecture_ids", "section_ids", "source_types", "versions", "text_hashes"):
+            _save_array(tmp_dir, key, columns[key])
+        # 崩溃遗留的同名段目录从未进入 manifest，可以安全覆盖
+        shutil.rmtree(course_dir / name, ignore_errors=True)
+        os.replace(tmp_dir, course_dir / name)
+
+    @staticmethod
+    def _segment_columns(segment: _Segment, rows: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        if rows is None:
+            rows = np.arange(segment.size)
+        return {
+            "ids": np.asarray(segment.ids[rows]),
+            "vectors": np.asarray(segment.vectors[rows]),
+            "lecture_ids": np.asarray(segment.lecture_ids[rows]),
+            "section_ids": np.asarray(segment.section_ids[rows]),
+            "source_types": np.asarray(segment.source_types[rows]),
+            "versions": np.asarray(segment.versions[rows]),
+            "text_hashes": np.asarray(segment.text_hashes[rows]),
+            "texts": [
+                bytes(segment.texts[int(segment.text_offsets[row]) : int(segment.text_offsets[row + 1])])
+                for row in rows
+            ],
+        }
+
+    @staticmethod
+    def _vocab_code(vocab: List[str], value: object) -> int:
+        text = "" if value is None else str(value)
+        if text not in vocab:
+            vocab.append(text)
+        return vocab.index(text)
+
+    def upsert(self, course_id: int, items: List[VectorStoreItem]) -> int:
+        if not items:
+            return 0
+        # 同一批次内重复的 chunk_id 以最后一次为准
+        latest = {item.chunk_id: item for item in items}
+        batch = list(latest.values())
+
+        course_dir = self._course_dir(course_id)
+        with self._write_lock(course_id):
+            try:
+                course_dir.mkdir(parents=True, exist_ok=True)
+                current = self._load(course_id)
+                manifest = dict(current.manifest) if current else {
+                    "segments": [],
+                    "count": 0,
+                    "next_segment": 1,
+                    "source_types": [],
+                    "versions": [],
+                }
+                vectors = np.asarray([item.vector for item in batch], dtype=np.float32)
+                dim = manifest.get("dim")
+                if dim is not None and vectors.shape[1] != dim:
+                    raise VectorStoreError(f"dimension_mismatch:{vectors.shape[1]}!={dim}")
+                manifest["dim"] = int(vectors.shape[1])
+                manifest["dtype"] = self.dtype.name
+                source_vocab = list(manifest["source_types"])
+                version_vocab = list(manifest["versions"])
+                columns = {
+                    "ids": np.asarray([item.chunk_id for item in batch], dtype=np.int64),
+                    "vectors": vectors,
+                    "lecture_ids": np.asarray(
+                        [int(item.metadata.get("lecture_id", MISSING_INT)) for item in batch], dtype=np.int64
+                    ),
+                    "section_ids": np.asarray(
+                        [int(item.metadata.get("section_id", MISSING_INT)) for item in batch], dtype=np.int64
+                    ),
+                    "source_types": np.asarray(
+                        [self._vocab_code(source_vocab, item.metadata.get("source_type")) for item in batch],
+                        dtype=np.int32,
+                    ),
+                    "versions": np.asarray(
+                        [self._vocab_code(version_vocab, item.metadata.get("embedding_version")) for item in batch],
+                        dtype=np.int32,
+                    ),
+                    "text_hashes": np.asarray(
+                        [str(item.metadata.get("text_hash", "")) for item in batch], dtype="S16"
+                    ),
+                    "texts": [(item.text or "").encode("utf-8") for item in batch],
+                }
+                manifest["source_types"] = source_vocab
+                manifest["versions"] = version_vocab
+
+                segments = list(current.segments) if current else []
+                obsolete: List[str] = []
+                name = f"seg_{manifest['next_segment']:06d}"
+                manifest["next_segment"] += 1
+                self._write_segment(course_dir, name, columns)
+                segments.append(self._open_segment(course_dir / name))
+
+                while len(segments) >= 2 and segments[-2].size <= segments[-1].size:
+                    older, newer = segments[-2], segments[-1]
+                    keep = np.flatnonzero(~np.isin(np.asarray(older.ids), np.asarray(newer.ids)))
+                    older_cols = self._segment_columns(older, keep)
+                    newer_cols = self._segment_columns(newer)
+                    merged = {
+                        key: older_cols[key] + newer_cols[key]
+                        if isinstance(older_cols[key], list)
+                        else np.concatenate([older_cols[key], newer_cols[key]])
+                        for key in older_cols
+                    }
+                    name = f"seg_{manifest['next_segment']:06d}"
+                    manifest["next_segment"] += 1
+                    self._write_segment(course_dir, name, merged)
+                    obsolete.extend([older.name, newer.name])
+                    segments[-2:] = [self._open_segment(course_dir / name)]
+
+                segments = _mark_shadowed_rows(segments)
+                manifest["segments"] = [{"name": seg.name, "size": seg.size} for seg in segments]
+                manifest["count"] = int(
+                    sum(seg.size if seg.alive is None else int(seg.alive.sum()) for seg in segments)
+                )
+                manifest["generation"] = int(manifest.get("generation", 0)) + 1
+                tmp_manifest = course_dir / f".{MANIFEST_NAME}.tmp"
+                tmp_manifest.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp_manifest, course_dir / MANIFEST_NAME)
+                for stale in obsolete:
+                    # 已打开的 mmap 在 Linux 上仍然有效，直接删除目录即可
+                    shutil.rmtree(course_dir / stale, ignore_errors=True)
+            except VectorStoreError:
+                raise
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.exception("Failed to upsert %s vectors into %s: %s", len(batch), course_dir, exc)
+                raise VectorStoreError("upsert_failed") from exc
+        return len(batch)
+
+    # ------------------------------------------------------------------ reading
+
+    def _filter_mask(
+        self,
+        segment: _Segment,
+        manifest: Dict[str, Any],
+        filters: Dict[str, int | str],
+    ) -> Tuple[Optional[np.ndarray], bool]:
+        """Return (row mask or None for all rows, whether any row can match)."""
+        mask = segment.alive
+        for key, value in filters.items():
+            if key == "lecture_id":
+                condition = segment.lecture_ids == int(value)
+            elif key == "section_id":
+                condition = segment.section_ids == int(value)
+            elif key == "source_type":
+                vocab = manifest.get("source_types", [])
+                if str(value) not in vocab:
+                    return None, False
+                condition = segment.source_types == vocab.index(str(value))
+            else:
+                raise VectorStoreError(f"unsupported_filter:{key}")
+            mask = condition if mask is None else (mask & condition)
+        return mask, True
+
+    def _probe_rows(self, segment: _Segment, query: np.ndarray) -> Optional[np.ndarray]:
+        if segment.centroids is None or segment.list_offsets is None:
+            return None
+        n_lists = segment.centroids.shape[0]
+        nprobe = min(self.nprobe, n_lists)
+        lists = np.argpartition(segment.centroids @ query, n_lists - nprobe)[n_lists - nprobe :]
+        offsets = segment.list_offsets
+        return np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in lists])
+
+    def _segment_candidates(
+        self,
+        segment: _Segment,
+        manifest: Dict[str, Any],
+        queries: np.ndarray,
+        top_k: int,
+        filters: Dict[str, int | str],
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Return per-query ``(rows, scores)`` top-k candidates for a ``(n_queries, dim)`` matrix."""
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        mask, possible = self._filter_mask(segment, manifest, filters)
+        if not possible:
+            return [empty] * queries.shape[0]
+
+        if segment.centroids is not None:
+            # IVF 段每个查询探测的列表不同，逐个查询计算
+            candidates = []
+            for query in queries:
+                rows = self._probe_rows(segment, query)
+                if mask is not None:
+                    rows = rows[mask[rows]]
+                scores = _score(segment.vectors, query[:, None], rows)[:, 0]
+                candidates.append(_top_rows(rows, scores, top_k))
+            return candidates
+
+        if mask is None:
+            rows = np.arange(segment.size)
+            scores = _score(segment.vectors, queries.T)
+        else:
+            rows = np.flatnonzero(mask)
+            if rows.shape[0] < segment.size * SPARSE_FILTER_RATIO:
+                scores = _score(segment.vectors, queries.T, rows)
+            else:
+                scores = _score(segment.vectors, queries.T)[rows]
+        return [_top_rows(rows, scores[:, col], top_k) for col in range(queries.shape[0])]
+
+    def _format_results(
+        self,
+        index: _CourseIndex,
+        course_id: int,
+        candidates: List[Tuple[float, _Segment, int]],
+        include_embeddings: bool = False,
+    ) -> List[Dict[str, object]]:
+        source_vocab = index.manifest.get("source_types", [])
+        version_vocab = index.manifest.get("versions", [])
+        results: List[Dict[str, object]] = []
+        for score, segment, row in candidates:
+            metadata: Dict[str, object] = {
+                "course_id": course_id,
+                "lecture_id": int(segment.lecture_ids[row]),
+                "section_id": int(segment.section_ids[row]),
+                "source_type": source_vocab[int(segment.source_types[row])],
+                "embedding_version": version_vocab[int(segment.versions[row])],
+                "text_hash": segment.text_hashes[row].decode("ascii"),
+            }
+            result: Dict[str, object] = {
+                "chunk_id": int(segment.ids[row]),
+                "text": segment.text(row),
+                "metadata": {k: v for k, v in metadata.items() if v not in (MISSING_INT, "")},
+                "score": float(score),
+            }
+            if include_embeddings:
+                result["embedding"] = np.asarray(segment.vectors[row], dtype=np.float32)
+            results.append(result)
+        return results
+
+    def search(
+        self,
+        course_id: int,
+        query_vector: List[float],
+        top_k: int,
+        filters: Optional[Dict[str, int | str]] = None,
+    ) -> List[Dict[str, object]]:
+        return self.search_many(course_id, [VectorQuery(vector=query_vector, top_k=top_k, filters=filters)])[0]
+
+    def search_many(self, course_id: int, queries: Sequence[VectorQuery]) -> List[List[Dict[str, object]]]:
+        index = self._load(course_id)
+        if index is None or index.count == 0 or not queries:
+            return [[] for _ in queries]
+        matrix = np.asarray([query.vector for query in queries], dtype=np.float32)
+        if matrix.shape[1] != index.manifest["dim"]:
+            raise VectorStoreError(f"dimension_mismatch:{matrix.shape[1]}!={index.manifest['dim']}")
+
+        results: List[List[Dict[str, object]]] = [[] for _ in queries]
+        for where, positions in group_by_filters(queries).items():
+            top_k = max(queries[pos].top_k for pos in positions)
+            merged: List[List[Tuple[float, _Segment, int]]] = [[] for _ in positions]
+            for segment in index.segments:
+                per_query = self._segment_candidates(segment, index.manifest, matrix[positions], top_k, dict(where))
+                for slot, (rows, scores) in enumerate(per_query):
+                    merged[slot].extend(zip(scores.tolist(), [segment] * len(rows), rows.tolist()))
+            for slot, pos in enumerate(positions):
+                best = sorted(merged[slot], key=lambda item: item[0], reverse=True)[: queries[pos].top_k]
+                results[pos] = self._format_results(index, course_id, best, queries[pos].include_embeddings)
+        return results
+
+    def count(self, course_id: int) -> int:
+        index = self._load(course_id)
+        return index.count if index else 0
+
+    def fingerprints(self, course_id: int, chunk_ids: Sequence[int]) -> Dict[int, Tuple[str, str]]:
+        index = self._load(course_id)
+        if index is None or not chunk_ids:
+            return {}
+        wanted = np.asarray(chunk_ids, dtype=np.int64)
+        version_vocab = index.manifest.get("versions", [])
+        fingerprints: Dict[int, Tuple[str, str]] = {}
+        for segment in index.segments:
+            mask = np.isin(segment.ids, wanted)
+            if segment.alive is not None:
+                mask &= segment.alive
+            for row in np.flatnonzero(mask).tolist():
+                fingerprints[int(segment.ids[row])] = (
+                    version_vocab[int(segment.versions[row])],
+                    segment.text_hashes[row].decode("ascii"),
+                )
+        return fingerprints
+
+    def vector_space(self, course_id: int) -> Optional[Tuple[str, int]]:
+        index = self._load(course_id)
+        if index is None:
+            return None
+        version_vocab = index.manifest.get("versions", [])
+        for segment in index.segments:
+            rows = np.arange(segment.size) if segment.alive is None else np.flatnonzero(segment.alive)
+            if rows.size:
+                return version_vocab[int(segment.versions[rows[0]])], int(segment.vectors.shape[1])
+        return None
+
+    def iter_items(self, course_id: int, page_size: int = 5000) -> Iterator[List[VectorStoreItem]]:
+        index = self._load(course_id)
+        if index is None:
+            return
+        for segment in index.segments:
+            rows = np.arange(segment.size) if segment.alive is None else np.flatnonzero(segment.alive)
+            for start in range(0, rows.shape[0], page_size):
+                page = rows[start : start + page_size]
+                results = self._format_results(
+                    index, course_id, [(0.0, segment, int(row)) for row in page], include_embeddings=True
+                )
+                yield [
+                    VectorStoreItem(
+                        chunk_id=int(item["chunk_id"]),
+                        text=str(item["text"]) or None,
+                        vector=item["embedding"].tolist(),
+                        metadata=item["metadata"],
+                    )
+                    for item in results
+                ]
+
+    def delete(self, course_id: int) -> bool:
+        course_dir = self._course_dir(course_id)
+        with self._write_lock(course_id):
+            with self._cache_lock:
+                self._cache.pop(course_id, None)
+            if not course_dir.exists():
+                logger.info("Vector index %s not found when deleting", course_dir)
+                return False
+            try:
+                shutil.rmtree(course_dir)
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.exception("Failed to delete vector index %s: %s", course_dir, exc)
+                raise VectorStoreError(f"delete_collection_failed:{course_dir.name}") from exc
+        logger.info("Deleted vector index %s", course_dir)
+        return True
+
+    def list_collections(self) -> List[str]:
+        return sorted(path.name for path in self.root.iterdir() if (path / MANIFEST_NAME).exists())
+
+
+def _mark_shadowed_rows(segments: List[_Segment]) -> List[_Segment]:
+    """Return copies of ``segments`` with rows overridden by a newer segment marked dead.
+
+    Copies keep segments shared with a cached index untouched while it serves reads.
+    """
+    marked: List[_Segment] = []
+    newer_ids = np.zeros(0, dtype=np.int64)
+    for segment in reversed(segments):
+        ids = np.asarray(segment.ids)
+        alive = ~np.isin(ids, newer_ids) if newer_ids.size else None
+        marked.append(replace(segment, alive=None if alive is None or alive.all() else alive))
+        newer_ids = np.concatenate([newer_ids, ids])
+    marked.reverse()
+    return marked
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark recall vs. vector size for Matryoshka truncation / float16 storage.
+
+以课程真实 Chunk 为语料，取部分 chunk 的开头片段作为查询，
+以全维 float32 的 top-k 为基准，统计各配置下的 recall@k 与单向量字节数。
+
+Usage:
+    python backend/scripts/benchmark_embedding_compression.py --course-id 1 --dims 1024 512 256 128
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from time import perf_counter
+
+import torch
+from sqlmodel import Session, select
+
+from app.database import engine, init_db
+from app.models import Chunk
+from app.services.embedding import compress_embeddings, encode_texts
+
+
+def _recall_at_k(reference: torch.Tensor, candidate: torch.Tensor) -> float:
+    hits = 0
+    for ref_row, cand_row in zip(reference.tolist(), candidate.tolist()):
+        hits += len(set(ref_row) & set(cand_row))
+    return hits / max(1, reference.numel())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark embedding truncation / precision.")
+    parser.add_argument("--course-id", type=int, required=True, help="Course ID providing the corpus")
+    parser.add_argument("--dims", type=int, nargs="+", default=[1024, 768, 512, 256, 128])
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled queries")
+    parser.add_argument("--query-chars", type=int, default=48, help="Prefix length used as query text")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    init_db()
+    with Session(engine) as session:
+        texts = session.exec(
+            select(Chunk.text)
+            .where(Chunk.course_id == args.course_id)
+            .order_by(Chunk.section_id, Chunk.order_in_section, Chunk.id)
+        ).all()
+    if not texts:
+        raise SystemExit(f"Course {args.course_id} has no chunks")
+
+    rng = random.Random(args.seed)
+    sampled = rng.sample(texts, min(args.queries, len(texts)))
+    queries = [text[: args.query_chars] for text in sampled]
+
+    corpus_full = encode_texts(list(texts))
+    query_full = encode_texts(queries)
+    top_k = min(args.top_k, corpus_full.shape[0])
+    reference = (query_full @ corpus_full.T).topk(top_k, dim=1).indices
+
+    report = []
+    full_dim = corpus_full.shape[1]
+    for dim in sorted({d for d in args.dims if d <= full_dim}, reverse=True):
+        for dtype, bytes_per_value in (("float32", 4), ("float16", 2)):
+            corpus = compress_embeddings(corpus_full, dim=dim, dtype=dtype)
+            query = compress_embeddings(query_full, dim=dim, dtype=dtype)
+            start = perf_counter()
+            candidate = (query @ corpus.T).topk(top_k, dim=1).indices
+            search_ms = (perf_counter() - start) * 1000
+            report.append(
+                {
+                    "dim": dim,
+                    "dtype": dtype,
+                    "bytes_per_vector": dim * bytes_per_value,
+                    "corpus_mb": round(dim * bytes_per_value * corpus.shape[0] / 1024 / 1024, 2),
+                    f"recall@{top_k}": round(_recall_at_k(reference, candidate), 4),
+                    "search_ms": round(search_ms, 2),
+                }
+            )
+
+    print(
+        json.dumps(
+            {"course_id": args.course_id, "chunks": len(texts), "queries": len(queries), "results": report},
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark HNSW recall / latency trade-offs over a course's Chroma collection.
+
+将课程集合中的向量复制到临时集合（每组 HNSW 参数一个），以精确暴力检索结果为基准，
+统计 recall@k 与单次查询延迟（p50/p95）。
+
+Usage:
+    python backend/scripts/benchmark_vector_index.py --course-id 1 --m 16 32 --search-ef 16 64 128
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+from time import perf_counter
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.vectorstore.base import collection_name
+from app.services.vectorstore.chroma import REBUILD_PAGE_SIZE, get_chroma_client, hnsw_metadata
+
+
+def _load_collection(name: str) -> Dict[str, list]:
+    collection = get_chroma_client().get_collection(name=name)
+    ids: List[str] = []
+    embeddings: List[List[float]] = []
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings"], limit=REBUILD_PAGE_SIZE, offset=offset)
+        ids.extend(page["ids"])
+        embeddings.extend(page["embeddings"])
+        if len(page["ids"]) < REBUILD_PAGE_SIZE:
+            return {"ids": ids, "embeddings": embeddings}
+        offset += REBUILD_PAGE_SIZE
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    return round(float(np.percentile(values, pct)), 3) if values else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Chroma HNSW parameters.")
+    parser.add_argument("--course-id", type=int, required=True)
+    parser.add_argument("--space", choices=["cosine", "l2", "ip"], default="cosine")
+    parser.add_argument("--m", type=int, nargs="+", default=[16])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 32, 64, 128])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = _load_collection(collection_name(args.course_id))
+    if not data["ids"]:
+        raise SystemExit(f"Collection for course {args.course_id} is empty")
+
+    matrix = np.asarray(data["embeddings"], dtype=np.float32)
+    rng = np.random.default_rng(args.seed)
+    query_rows = rng.choice(matrix.shape[0], min(args.queries, matrix.shape[0]), replace=False)
+    queries = matrix[query_rows]
+    top_k = min(args.top_k, matrix.shape[0])
+    exact = np.argsort(-(queries @ matrix.T), axis=1)[:, :top_k]
+    exact_ids = [{data["ids"][i] for i in row} for row in exact]
+
+    client = get_chroma_client()
+    report = []
+    grid = itertools.product(args.m, args.construction_ef, args.search_ef)
+    for idx, (m, construction_ef, search_ef) in enumerate(grid):
+        name = f"bench_{collection_name(args.course_id)}_{idx}"
+        params = {"space": args.space, "m": m, "construction_ef": construction_ef, "search_ef": search_ef}
+        try:
+            client.delete_collection(name=name)
+        except ValueError:
+            pass
+        collection = client.create_collection(name=name, metadata=hnsw_metadata(params))
+        build_start = perf_counter()
+        for start in range(0, len(data["ids"]), REBUILD_PAGE_SIZE):
+            collection.add(
+                ids=data["ids"][start : start + REBUILD_PAGE_SIZE],
+                embeddings=data["embeddings"][start : start + REBUILD_PAGE_SIZE],
+            )
+        build_ms = (perf_counter() - build_start) * 1000
+
+        latencies: List[float] = []
+        hits = 0
+        for query, expected in zip(queries, exact_ids):
+            start = perf_counter()
+            response = collection.query(query_embeddings=[query.tolist()], n_results=top_k, include=[])
+            latencies.append((perf_counter() - start) * 1000)
+            hits += len(expected & set(response["ids"][0]))
+        client.delete_collection(name=name)
+
+        report.append(
+            {
+                **params,
+                f"recall@{top_k}": round(hits / (len(exact_ids) * top_k), 4),
+                "p50_ms": _percentile(latencies, 50),
+                "p95_ms": _percentile(latencies, 95),
+                "build_ms": round(build_ms, 1),
+            }
+        )
+
+    print(
+        json.dumps(
+            {"course_id": args.course_id, "vectors": len(data["ids"]), "queries": len(queries), "results": report},
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
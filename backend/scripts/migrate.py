@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Apply schema migrations and verify that hot queries use their indexes.
+
+Usage:
+    python backend/scripts/migrate.py upgrade [--target 2]
+    python backend/scripts/migrate.py status
+    python backend/scripts/migrate.py check-plans   # 任一查询未走预期索引时退出码为 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+
+from sqlmodel import SQLModel
+
+from app import models  # noqa: F401  # Ensure models are imported
+from app.database import engine
+from app.migrations import check_query_plans, migration_status, run_migrations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Schema migration runner.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = sub.add_parser("upgrade", help="Create missing tables and apply pending migrations")
+    upgrade_parser.add_argument("--target", type=int, default=None, help="Stop after this version")
+    sub.add_parser("status", help="List migrations and when they were applied")
+    sub.add_parser("check-plans", help="EXPLAIN hot queries and check they use the expected indexes")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        SQLModel.metadata.create_all(engine)
+        result = {"applied": run_migrations(engine, args.target)}
+    elif args.command == "status":
+        result = {"migrations": migration_status(engine)}
+    else:
+        plans = check_query_plans(engine)
+        result = {"ok": all(plan["ok"] for plan in plans), "queries": plans}
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if result.get("ok") is False:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Export / import a course's vectors as a checksummed snapshot file.
+
+在批处理节点上完成向量化后导出快照，拷贝到服务节点导入即可，无需重新跑 embedding。
+
+Usage:
+    python backend/scripts/vector_snapshot.py export --course-id 1 --output course_1.vsnap --dtype float16
+    python backend/scripts/vector_snapshot.py import --course-id 1 --input course_1.vsnap
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from sqlmodel import Session
+
+from app.database import engine, init_db
+from app.services.vector_snapshot import SnapshotError, export_course_vectors, import_course_vectors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export or import course vector snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="Write course vectors to a snapshot file")
+    export_parser.add_argument("--course-id", type=int, required=True)
+    export_parser.add_argument("--output", type=Path, required=True)
+    export_parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    export_parser.add_argument("--include-texts", action="store_true", help="Also store chunk text in the snapshot")
+
+    import_parser = sub.add_parser("import", help="Load a snapshot into the configured vector store")
+    import_parser.add_argument("--course-id", type=int, required=True)
+    import_parser.add_argument("--input", type=Path, required=True)
+    import_parser.add_argument(
+        "--merge", action="store_true", help="Upsert into the existing collection instead of replacing it"
+    )
+    import_parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            result = export_course_vectors(args.course_id, args.output, args.dtype, args.include_texts)
+        else:
+            init_db()
+            with Session(engine) as session:
+                result = import_course_vectors(
+                    session, args.course_id, args.input, replace=not args.merge, batch_size=args.batch_size
+                )
+    except SnapshotError as exc:
+        print(json.dumps({"status": "failed", "error": str(exc)}, ensure_ascii=False))
+        raise SystemExit(1)
+
+    print(json.dumps({"status": "ok", **result}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()